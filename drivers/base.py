@@ -45,7 +45,7 @@ class DeviceState(Enum):
     JOG = "jog"
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """3D pozíció reprezentáció"""
     x: float = 0.0
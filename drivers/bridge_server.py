@@ -652,8 +652,8 @@ device_manager = DeviceManager()
 # Aktív tesztek leállítási jelzői (device_id -> threading.Event)
 _active_test_events: Dict[str, threading.Event] = {}
 
-# Aktív tesztek napló bejegyzései (device_id -> list[dict]) - a teszt objektum _log_entries listája
-_active_test_progress: Dict[str, list] = {}
+# Aktív tesztek napló bejegyzései (device_id -> list/deque[dict]) - a teszt objektum _log_entries gyűjteménye
+_active_test_progress: Dict[str, Any] = {}
 
 
 async def _sync_control_from_firmware(device: Any, changed_by: str) -> Optional[Dict[str, Any]]:
@@ -2322,10 +2322,15 @@ async def get_test_progress(device_id: str, after: int = 0):
     if log is None:
         return {"entries": [], "total": 0, "running": False}
     
-    entries = log[after:]  # Csak az új bejegyzések
+    # Pillanatkép: a napló lehet deque is, amit a teszt szál közben bővít
+    snapshot = list(log)
+    entries = [
+        {**entry, "t": round(entry["t"], 2)} if "t" in entry else entry
+        for entry in snapshot[after:]  # Csak az új bejegyzések
+    ]
     return {
         "entries": entries,
-        "total": len(log),
+        "total": len(snapshot),
         "running": device_id in _active_test_events,
     }
 
@@ -361,9 +361,10 @@ class ClosedLoopCapability:
             pos_change = abs(current_pos - last_pos)
             
             if pos_change < stall_tolerance:
+                now = asyncio.get_running_loop().time()
                 if stall_start_time is None:
-                    stall_start_time = asyncio.get_event_loop().time()
-                elif asyncio.get_event_loop().time() - stall_start_time > stall_timeout:
+                    stall_start_time = now
+                elif now - stall_start_time > stall_timeout:
                     # Stall detected!
                     logger.info(f"    Stall detected @ {current_pos:.1f}°")
                     
@@ -390,8 +391,9 @@ class ClosedLoopCapability:
     
     async def _wait_for_idle(self, timeout: float = 10.0) -> bool:
         """Várakozás IDLE állapotra."""
-        start = asyncio.get_event_loop().time()
-        while asyncio.get_event_loop().time() - start < timeout:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
             status = await self.get_grbl_status()
             state = status.get('state', '').lower()
             if 'idle' in state:
@@ -176,6 +176,14 @@ class GrblDeviceBase(SerialDeviceBase):
     GRBL_ALARM_PATTERN = re.compile(r"^ALARM:(\d+)$", re.IGNORECASE)
     GRBL_SETTING_PATTERN = re.compile(r"^\$(\d+)=(.+)$")
     
+    # Lezáró sor felismerés: első karakter (kisbetűsítve) -> egyetlen minta.
+    # Soronként legfeljebb egy regex fut a korábbi három helyett.
+    _TERMINATOR_DISPATCH = {
+        'o': GRBL_OK_PATTERN,
+        'e': GRBL_ERROR_PATTERN,
+        'a': GRBL_ALARM_PATTERN,
+    }
+    
     # Státusz pattern - kezeli mind a GRBL 0.9 (,) mind a 1.1 (|) szeparátort
     # és az állapot alkódokat is (pl. Door:0, Hold:1)
     GRBL_STATE_PATTERN = re.compile(r"<(\w+(?::\d+)?)[,|]")
@@ -191,17 +199,34 @@ class GrblDeviceBase(SerialDeviceBase):
     GRBL_OWNV_PATTERN = re.compile(r"\|OWNV:(\d+)")
     
     # Full status pattern for compatibility
+    # (a keret vége negált karakterosztállyal - nincs lusta .*? visszalépés)
     GRBL_STATUS_PATTERN = re.compile(
         r"<(\w+)[,|]"
         r"MPos:(-?\d+\.?\d*),(-?\d+\.?\d*),(-?\d+\.?\d*)"
         r"(?:[,|]WPos:(-?\d+\.?\d*),(-?\d+\.?\d*),(-?\d+\.?\d*))?"
-        r"(?:[,|].*?)?"
+        r"(?:[,|][^>\n]*)?"
         r">"
     )
     
+    # Zárójeles G-code komment (program betöltés)
+    _PAREN_COMMENT_RE = re.compile(r"\([^)]*\)")
+    
     # Supports classic "Grbl 1.1h" and grblHAL-like banners.
     GRBL_WELCOME_PATTERN = re.compile(r"Grbl(?:HAL)?\s+(\d+\.\d+\w*)", re.IGNORECASE)
     
+    # Adaptív status polling: mozgás közben a megadott intervallummal,
+    # nyugalomban ritkábban (s)
+    STATUS_POLL_IDLE_INTERVAL = 1.0
+    # Foglalt serial lock (futó parancs) esetén nem állunk be mögé, csak
+    # ennyi idő múlva próbáljuk újra (s) - legfeljebb STATUS_POLL_MAX_BUSY_SKIPS
+    # egymás utáni alkalommal, utána beállunk a (FIFO) lock sorába. Program
+    # futtatásnál a sorok folyamatosan foglalják a lockot, így a poll csak
+    # a sorok között kap helyet.
+    STATUS_POLL_BUSY_RETRY = 0.05
+    STATUS_POLL_MAX_BUSY_SKIPS = 3
+    _POLL_ACTIVE_GRBL_STATES = frozenset((GrblState.RUN, GrblState.JOG, GrblState.HOME))
+    _POLL_ACTIVE_DEVICE_STATES = frozenset((DeviceState.RUNNING, DeviceState.HOMING))
+    
     def __init__(
         self,
         device_id: str,
@@ -259,64 +284,69 @@ class GrblDeviceBase(SerialDeviceBase):
         
         async with self._serial_lock:
             cmd = command.strip()
-            await self._flush_input_buffer_unlocked()
             
             # '?' GRBL realtime parancs - nem kell line terminator
             if cmd == '?':
-                await asyncio.to_thread(self._serial.write, b'?')
-            else:
-                await asyncio.to_thread(self._serial.write, f"{cmd}\r\n".encode())
+                await self._drain_and_write(b'?')
+                # A státusz riportra nem jön "ok": a '<...>' sor zárja a
+                # választ, így a lock nem marad a tétlen várakozás idejére
+                return await self._read_response_unlocked(
+                    timeout=timeout, terminator=self._is_status_terminator
+                )
             
+            await self._drain_and_write(f"{cmd}\r\n".encode())
             return await self._read_response_unlocked(timeout=timeout)
     
-    async def _read_response_unlocked(self, timeout: float = None) -> str:
-        """
-        GRBL válasz olvasása - "ok" vagy "error:X" lezárással.
+    async def _send_line_bytes(self, data: bytes, timeout: float = None) -> str:
         """
-        if not self._serial:
-            return ""
+        Előre kódolt (\\r\\n-nel lezárt) programsor küldése.
         
-        response_lines = []
-        start_time = asyncio.get_event_loop().time()
-        timeout = timeout or self.timeout
+        Ugyanaz, mint a _send_command, de soronként nincs strip/encode -
+        a program futtatás a sorokat indításkor egyszer kódolja.
+        """
+        if not self.is_serial_open:
+            raise ConnectionError("Nincs kapcsolat")
         
-        while True:
-            in_waiting = await asyncio.to_thread(
-                lambda: self._serial.in_waiting if self._serial else 0
-            )
-            
-            if in_waiting > 0:
-                try:
-                    line_bytes = await asyncio.to_thread(self._serial.readline)
-                    line = line_bytes.decode(errors='replace').strip()
-                    if line:
-                        response_lines.append(line)
-                        
-                        # GRBL "ok" vagy "error:X" - azonnal visszatérünk
-                        if self.GRBL_OK_PATTERN.match(line):
-                            break
-                        if self.GRBL_ERROR_PATTERN.match(line):
-                            break
-                        if self.GRBL_ALARM_PATTERN.match(line):
-                            break
-                except Exception:
-                    pass
-            else:
-                # Ha van már válasz és nincs több adat
-                if response_lines:
-                    await asyncio.sleep(0.05)
-                    in_waiting2 = await asyncio.to_thread(
-                        lambda: self._serial.in_waiting if self._serial else 0
-                    )
-                    if in_waiting2 == 0:
-                        break
-                await asyncio.sleep(0.01)
-            
-            # Timeout
-            if asyncio.get_event_loop().time() - start_time > timeout:
-                break
+        async with self._serial_lock:
+            await self._drain_and_write(data)
+            return await self._read_response_unlocked(timeout=timeout)
+    
+    @classmethod
+    def _read_gcode_file(cls, filepath: str) -> List[str]:
+        """
+        G-code fájl beolvasása és tisztítása (komment, üres sor szűrés).
         
-        return "\n".join(response_lines)
+        Nem érint példány állapotot, így szálon futtatható - nagy fájlnál
+        sem blokkolja az event loop-ot.
+        """
+        strip_parens = cls._PAREN_COMMENT_RE.sub
+        lines = []
+        with open(filepath, "r") as f:
+            for line in f:
+                line = line.strip()
+                if ";" in line:
+                    line = line.split(";")[0].strip()
+                if "(" in line:
+                    line = strip_parens("", line).strip()
+                if line:
+                    lines.append(line)
+        return lines
+    
+    @staticmethod
+    def _encode_gcode_lines(lines: List[str]) -> List[bytes]:
+        """G-code sorok egyszeri kódolása a _send_line_bytes számára"""
+        return [f"{line.strip()}\r\n".encode() for line in lines]
+    
+    def _is_response_terminator(self, line: str) -> bool:
+        """GRBL "ok", "error:X" vagy ALARM sor - a válasz vége"""
+        pattern = self._TERMINATOR_DISPATCH.get(line[:1].lower())
+        return pattern is not None and pattern.match(line) is not None
+    
+    def _is_status_terminator(self, line: str) -> bool:
+        """'?' válasz vége: teljes '<...>' státusz riport vagy normál lezáró"""
+        if line[:1] == '<':
+            return line.endswith('>')
+        return self._is_response_terminator(line)
     
     # =========================================
     # GRBL PROTOKOLL METÓDUSOK
@@ -326,7 +356,7 @@ class GrblDeviceBase(SerialDeviceBase):
         """GRBL soft reset (Ctrl-X, 0x18) küldése."""
         if not self.is_serial_open:
             return
-        await asyncio.to_thread(self._serial.write, b'\x18')
+        await self._write_bytes(b'\x18')
         await asyncio.sleep(1.5)
         if self._serial.in_waiting:
             await asyncio.to_thread(self._serial.read, self._serial.in_waiting)
@@ -413,13 +443,24 @@ class GrblDeviceBase(SerialDeviceBase):
         try:
             response = await self._send_command("?", timeout=0.5)
             
-            state_match = self.GRBL_STATE_PATTERN.search(response)
-            mpos_match = self.GRBL_MPOS_PATTERN.search(response)
-            wpos_match = self.GRBL_WPOS_PATTERN.search(response)
-            pn_match = self.GRBL_PN_PATTERN.search(response)
-            own_match = self.GRBL_OWN_PATTERN.search(response)
-            ownr_match = self.GRBL_OWNR_PATTERN.search(response)
-            ownv_match = self.GRBL_OWNV_PATTERN.search(response)
+            # Csak a '<...>' státusz keretet vizsgáljuk - ha nincs, regex
+            # sem fut; az opcionális mezők regexét substring előszűrő védi
+            start = response.find('<')
+            if start < 0:
+                return {}
+            end = response.find('>', start)
+            frame = response[start:end + 1] if end >= 0 else response[start:]
+            
+            state_match = self.GRBL_STATE_PATTERN.match(frame)
+            mpos_match = self.GRBL_MPOS_PATTERN.search(frame)
+            wpos_match = self.GRBL_WPOS_PATTERN.search(frame)
+            pn_match = self.GRBL_PN_PATTERN.search(frame) if "|Pn:" in frame else None
+            if "|OWN" in frame:
+                own_match = self.GRBL_OWN_PATTERN.search(frame)
+                ownr_match = self.GRBL_OWNR_PATTERN.search(frame)
+                ownv_match = self.GRBL_OWNV_PATTERN.search(frame)
+            else:
+                own_match = ownr_match = ownv_match = None
             
             if state_match:
                 raw_state = state_match.group(1)
@@ -609,8 +650,17 @@ class GrblDeviceBase(SerialDeviceBase):
             self._poll_task = None
     
     async def _poll_status(self, interval: float) -> None:
-        """Állapot polling loop."""
+        """Állapot polling loop.
+        
+        Mozgás közben (vagy közvetlenül egy parancs után) az interval
+        szerint pollol, nyugalomban STATUS_POLL_IDLE_INTERVAL-onként.
+        Foglalt serial lock mellett kihagyja a lekérdezést, de legfeljebb
+        STATUS_POLL_MAX_BUSY_SKIPS-szer egymás után - utána a lockra vár.
+        """
         empty_streak = 0
+        busy_skips = 0
+        idle_interval = max(interval, self.STATUS_POLL_IDLE_INTERVAL)
+        active = True
         while self._status_polling and self._connected:
             try:
                 jog_session_active = bool(getattr(self, "_jog_session_active", False))
@@ -620,6 +670,13 @@ class GrblDeviceBase(SerialDeviceBase):
                 if self._control_owner == "panel":
                     await asyncio.sleep(interval * 5)
                     continue
+                if self._serial_lock.locked() and busy_skips < self.STATUS_POLL_MAX_BUSY_SKIPS:
+                    # Parancs fut - utána valószínűleg mozgás indul
+                    busy_skips += 1
+                    active = True
+                    await asyncio.sleep(self.STATUS_POLL_BUSY_RETRY)
+                    continue
+                busy_skips = 0
                 result = await self.get_grbl_status()
                 if result:
                     empty_streak = 0
@@ -627,9 +684,13 @@ class GrblDeviceBase(SerialDeviceBase):
                     empty_streak += 1
                     if empty_streak >= 3:
                         self._control_owner = "panel"
+                active = (
+                    self._grbl_state in self._POLL_ACTIVE_GRBL_STATES
+                    or self._status.state in self._POLL_ACTIVE_DEVICE_STATES
+                )
             except Exception:
                 pass
-            await asyncio.sleep(interval)
+            await asyncio.sleep(interval if active else idle_interval)
     
     # =========================================
     # JOG STOP - közös implementáció $J= parancsokhoz
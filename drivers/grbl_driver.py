@@ -504,13 +504,16 @@ class GrblDevice(GrblDeviceBase):
                 # Pozíció lekérdezése soft reset előtt
                 saved_pos = Position()
                 async with self._serial_lock:
-                    await asyncio.to_thread(self._serial.write, b"?")
+                    await self._write_bytes(b"?")
                     await asyncio.sleep(0.02)
-                    in_waiting = await asyncio.to_thread(lambda: self._serial.in_waiting if self._serial else 0)
+                    in_waiting = await asyncio.to_thread(getattr, self._serial, "in_waiting", 0)
                     if in_waiting > 0:
                         line_bytes = await asyncio.to_thread(self._serial.readline)
                         response = line_bytes.decode().strip()
-                        match = self.GRBL_STATUS_PATTERN.search(response)
+                        match = (
+                            self.GRBL_STATUS_PATTERN.match(response)
+                            if response.startswith('<') else None
+                        )
                         if match:
                             saved_pos = Position(
                                 x=float(match.group(2)),
@@ -599,7 +602,7 @@ class GrblDevice(GrblDeviceBase):
             self._jog_session_feed_rate = feed_rate
             self._jog_session_tick_ms = max(20, min(200, int(tick_ms)))
             self._jog_session_heartbeat_timeout = max(0.15, min(2.0, float(heartbeat_timeout)))
-            self._jog_session_last_beat = asyncio.get_event_loop().time()
+            self._jog_session_last_beat = asyncio.get_running_loop().time()
             self._streaming_last_success_ts = self._jog_session_last_beat
 
             if self._jog_session_task and not self._jog_session_task.done():
@@ -639,7 +642,7 @@ class GrblDevice(GrblDeviceBase):
                 self._jog_session_direction = 1.0 if direction > 0 else -1.0
             if feed_rate is not None:
                 self._jog_session_feed_rate = max(1.0, float(feed_rate))
-            self._jog_session_last_beat = asyncio.get_event_loop().time()
+            self._jog_session_last_beat = asyncio.get_running_loop().time()
             return True
 
     async def stop_jog_session(self, hard_stop: bool = False) -> bool:
@@ -707,8 +710,9 @@ class GrblDevice(GrblDeviceBase):
         """
         Streaming jog loop heartbeat timeout figyeléssel.
         """
+        loop = asyncio.get_running_loop()
         try:
-            next_due = asyncio.get_event_loop().time()
+            next_due = loop.time()
             while True:
                 async with self._jog_session_lock:
                     if not self._jog_session_active:
@@ -720,7 +724,7 @@ class GrblDevice(GrblDeviceBase):
                     heartbeat_timeout = self._jog_session_heartbeat_timeout
                     last_beat = self._jog_session_last_beat
 
-                now = asyncio.get_event_loop().time()
+                now = loop.time()
                 if last_beat and now - last_beat > heartbeat_timeout:
                     # Watchdog stop: heartbeat megszakadt.
                     await self.hard_jog_stop()
@@ -743,16 +747,16 @@ class GrblDevice(GrblDeviceBase):
 
                 commands = self._protocol.build_jog_commands(axis, distance, effective_feed_rate)
                 for command in commands:
-                    send_started = asyncio.get_event_loop().time()
+                    send_started = loop.time()
                     send_result = await self._send_streaming_jog_with_guard(command, max_retries=3)
-                    send_elapsed_ms = int((asyncio.get_event_loop().time() - send_started) * 1000)
+                    send_elapsed_ms = int((loop.time() - send_started) * 1000)
                     if send_elapsed_ms > 0:
                         target_tick = max(float(tick_ms), min(200.0, send_elapsed_ms * 1.2))
                         self._adaptive_tick_ms = (self._adaptive_tick_ms * 0.75) + (target_tick * 0.25)
                     error_code = send_result.get("error_code")
                     if error_code == 8:
                         self._streaming_consecutive_error8 += 1
-                        now_ts = asyncio.get_event_loop().time()
+                        now_ts = loop.time()
                         if (now_ts - self._streaming_last_success_ts) <= 3.0:
                             await asyncio.sleep(0.01 * min(self._streaming_consecutive_error8, 5))
                             continue
@@ -784,14 +788,14 @@ class GrblDevice(GrblDeviceBase):
                             self._jog_session_active = False
                         return
                     self._streaming_consecutive_error8 = 0
-                    self._streaming_last_success_ts = asyncio.get_event_loop().time()
+                    self._streaming_last_success_ts = loop.time()
 
                 next_due += tick_sec
-                delay = next_due - asyncio.get_event_loop().time()
+                delay = next_due - loop.time()
                 if delay > 0:
                     await asyncio.sleep(delay)
                 else:
-                    next_due = asyncio.get_event_loop().time()
+                    next_due = loop.time()
         finally:
             async with self._jog_session_lock:
                 if self._jog_session_task and self._jog_session_task.done():
@@ -823,21 +827,8 @@ class GrblDevice(GrblDeviceBase):
     async def load_file(self, filepath: str) -> bool:
         """G-code fájl betöltése"""
         try:
-            with open(filepath, "r") as f:
-                lines = f.readlines()
-            
-            # Üres sorok és kommentek szűrése
-            self._gcode_lines = []
-            for line in lines:
-                line = line.strip()
-                # Komment eltávolítása
-                if ";" in line:
-                    line = line.split(";")[0].strip()
-                if "(" in line:
-                    line = re.sub(r"\([^)]*\)", "", line).strip()
-                
-                if line:
-                    self._gcode_lines.append(line)
+            # Beolvasás és komment/üres sor szűrés szálon (event loop szabad)
+            self._gcode_lines = await asyncio.to_thread(self._read_gcode_file, filepath)
             
             self._current_line_index = 0
             self._status.current_file = filepath
@@ -898,8 +889,8 @@ class GrblDevice(GrblDeviceBase):
         await asyncio.sleep(initial_delay)
 
         active_states = {GrblState.RUN, GrblState.JOG, GrblState.HOME}
-        loop = asyncio.get_event_loop()
-        start = loop.time()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
 
         while self._running:
             try:
@@ -910,7 +901,7 @@ class GrblDevice(GrblDeviceBase):
             if self._grbl_state not in active_states:
                 return True
 
-            if loop.time() - start > max_wait:
+            if loop.time() > deadline:
                 return False
 
             await asyncio.sleep(poll_interval)
@@ -922,6 +913,7 @@ class GrblDevice(GrblDeviceBase):
         self._set_state(DeviceState.RUNNING)
 
         total_lines = len(self._gcode_lines)
+        program = self._encode_gcode_lines(self._gcode_lines)
 
         while self._running and self._current_line_index < total_lines:
             while self._paused:
@@ -932,8 +924,7 @@ class GrblDevice(GrblDeviceBase):
             if not self._running:
                 break
 
-            line = self._gcode_lines[self._current_line_index]
-            response = await self._send_command(line)
+            response = await self._send_line_bytes(program[self._current_line_index])
 
             if self.GRBL_ERROR_PATTERN.search(response):
                 self._set_error(f"G-code hiba (sor {self._current_line_index + 1}): {response}")
@@ -29,6 +29,8 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+# IK ágváltás tűrése (fok): a két könyök ág csak egyenes kar közelében ér össze
+BRANCH_SWITCH_MAX_DEG = 5.0
 
 
 @dataclass
@@ -91,7 +93,7 @@ class RobotConfig:
             self.pushrod = PushrodConfig()
 
 
-@dataclass
+@dataclass(slots=True)
 class JointAngles:
     """Joint szögek fokban"""
     j1: float  # Bázis forgás (Z tengely GRBL-ben)
@@ -109,7 +111,7 @@ class JointAngles:
         }
 
 
-@dataclass 
+@dataclass(slots=True)
 class CartesianPosition:
     """Cartesian pozíció mm-ben"""
     x: float
@@ -317,7 +319,8 @@ def forward_kinematics(
 def inverse_kinematics(
     x: float, y: float, z: float,
     config: RobotConfig = None,
-    elbow_up: bool = True
+    elbow_up: bool = True,
+    seed: Optional[JointAngles] = None
 ) -> JointAngles:
     """
     Inverz kinematika: Cartesian (x,y,z) → Joint szögek (j1,j2,j3_motor)
@@ -326,6 +329,8 @@ def inverse_kinematics(
         x, y, z: Robot-fej pozíció mm-ben
         config: Robot méretek
         elbow_up: True = könyök felfelé konfiguráció
+        seed: Aktuális joint pozíció - ha meg van adva, az elbow_up helyett
+              a seed könyök ága marad (lásd select_ik_solution)
     
     Returns:
         JointAngles: j1, j2, j3_motor fokban (j3 a motor szög, nem a valós könyök szög!)
@@ -334,16 +339,19 @@ def inverse_kinematics(
     if config is None:
         config = RobotConfig()
     
+    if seed is not None:
+        return select_ik_solution(inverse_kinematics_branches(x, y, z, config), seed, config)
+    
     # J1: Bázis forgás (felülnézetből)
     j1 = math.degrees(math.atan2(y, x))
     
     # 2D probléma az r-z síkban
-    r = math.sqrt(x*x + y*y)  # vízszintes távolság a bázistól
+    r = math.hypot(x, y)  # vízszintes távolság a bázistól
     h = z - config.L1  # magasság a váll szintje felett
     
     # Távolság a vállízelettől a célpontig
-    d_sq = r*r + h*h
-    d = math.sqrt(d_sq)
+    d = math.hypot(r, h)
+    d_sq = d * d
     
     # Speciális eset: célpont nagyon közel van a vállhoz
     if d < 0.001:
@@ -355,7 +363,9 @@ def inverse_kinematics(
     # Cosine law a könyök belső szögére
     # d² = L2² + L3² - 2*L2*L3*cos(belső_szög)
     # belső_szög = 180° - j3 (ahol j3 a hajlítási szög)
-    cos_inner = (config.L2**2 + config.L3**2 - d_sq) / (2 * config.L2 * config.L3)
+    L2 = config.L2
+    L3 = config.L3
+    cos_inner = (L2 * L2 + L3 * L3 - d_sq) / (2.0 * L2 * L3)
     cos_inner = max(-1.0, min(1.0, cos_inner))
     
     inner_angle = math.acos(cos_inner)  # Belső szög a könyöknél (radiánban)
@@ -371,7 +381,7 @@ def inverse_kinematics(
     
     # beta = szög a felkar és a váll-célpont vonal között
     # Szinusz tétel: sin(beta)/L3 = sin(inner_angle)/d
-    sin_beta = config.L3 * math.sin(inner_angle) / d
+    sin_beta = L3 * math.sin(inner_angle) / d
     sin_beta = max(-1.0, min(1.0, sin_beta))
     beta = math.asin(sin_beta)
     
@@ -400,6 +410,52 @@ def inverse_kinematics(
     return JointAngles(j1, j2, j3_motor, True, "")
 
 
+def inverse_kinematics_branches(
+    x: float, y: float, z: float,
+    config: RobotConfig = None
+) -> Tuple[JointAngles, JointAngles]:
+    """IK mindkét könyök ágra: (elbow_up, elbow_down)"""
+    return (
+        inverse_kinematics(x, y, z, config, elbow_up=True),
+        inverse_kinematics(x, y, z, config, elbow_up=False),
+    )
+
+
+def select_ik_solution(
+    solutions: Tuple[JointAngles, JointAngles],
+    seed: Optional[JointAngles] = None,
+    config: RobotConfig = None,
+    max_branch_switch: float = BRANCH_SWITCH_MAX_DEG
+) -> JointAngles:
+    """
+    IK ág választás az aktuális joint pozíció (seed) alapján.
+    
+    A seed könyök ága marad (valós könyök szög <= 0 → elbow_up). A másik
+    ágra csak akkor vált, ha a seed ága nem érvényes és a másik megoldás
+    legfeljebb max_branch_switch fokra van a seed-től (egyenes kar közelében
+    a két ág összeér) - különben a seed ágának érvénytelen megoldása jön
+    vissza, így a hívó elutasítja a mozgást ahelyett, hogy a kar átbillenne.
+    
+    Args:
+        solutions: (elbow_up, elbow_down) - lásd inverse_kinematics_branches
+        seed: Aktuális joint pozíció (j3 motor szög); None = elbow_up
+        config: Robot méretek (pushrod konverzióhoz)
+        max_branch_switch: Ágváltás megengedett legnagyobb tengelyenkénti eltérése (fok)
+    """
+    if seed is None:
+        return solutions[0]
+    if config is None:
+        config = RobotConfig()
+    
+    elbow_up = motor_angle_to_elbow_angle(seed.j3, config) <= 0
+    preferred, other = solutions if elbow_up else solutions[::-1]
+    if preferred.valid or not other.valid:
+        return preferred
+    
+    dist = max(abs(other.j1 - seed.j1), abs(other.j2 - seed.j2), abs(other.j3 - seed.j3))
+    return other if dist <= max_branch_switch else preferred
+
+
 def grbl_to_joints(grbl_pos: dict) -> JointAngles:
     """GRBL pozíció konvertálása joint szögekre"""
     return JointAngles(
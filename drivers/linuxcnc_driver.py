@@ -8,7 +8,7 @@ elérhetőnek kell lennie (linuxcnc csomag).
 
 import asyncio
 import os
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 
 # LinuxCNC Python modul importálása
@@ -40,6 +40,29 @@ except ImportError:
     )
 
 
+def _fast_parse_ini(text: str) -> Dict[str, Dict[str, str]]:
+    """
+    Minimális INI feldolgozó a LinuxCNC konfigurációhoz.
+    
+    Csak a szekciókat és a `KULCS = érték` sorokat kezeli (regex és
+    configparser nélkül). Kommentek (`#`, `;`) és üres sorok kimaradnak.
+    """
+    sections: Dict[str, Dict[str, str]] = {}
+    current: Optional[Dict[str, str]] = None
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            current = sections.setdefault(line[1:-1].strip(), {})
+            continue
+        if current is None or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        current[key.strip()] = value.strip()
+    return sections
+
+
 class LinuxCNCDevice(JogSafeDeviceDriver):
     """
     LinuxCNC-alapú eszközök drivere.
@@ -83,6 +106,12 @@ class LinuxCNCDevice(JogSafeDeviceDriver):
         3: "mdi",       # MODE_MDI
     }
     
+    # Munkadarab koordináta rendszerek: G54=1, G55=2, ..., G59.3=9
+    WORK_OFFSET_MAP = {
+        "G54": 1, "G55": 2, "G56": 3, "G57": 4,
+        "G58": 5, "G59": 6, "G59.1": 7, "G59.2": 8, "G59.3": 9,
+    }
+    
     def __init__(
         self,
         device_id: str,
@@ -109,10 +138,18 @@ class LinuxCNCDevice(JogSafeDeviceDriver):
         # Állapot polling
         self._status_polling = False
         self._poll_task: Optional[asyncio.Task] = None
+        # Folyamatban lévő get_status poll (single-flight: a párhuzamos
+        # hívók erre várnak, nem indítanak saját NML kört)
+        self._inflight_status: Optional[asyncio.Future] = None
         
         # Gép info (INI-ből)
         self._num_joints = 3
         self._axis_letters = ["X", "Y", "Z"]
+        
+        # stat mezők elérhetősége (a binding verziójától függ, connect-kor
+        # egyszer döntjük el, nem minden pollnál)
+        self._has_total_lines = False
+        self._has_spindle = False
     
     # =========================================
     # KAPCSOLAT KEZELÉS
@@ -134,6 +171,10 @@ class LinuxCNCDevice(JogSafeDeviceDriver):
             # Tengelyek számának lekérdezése
             self._num_joints = self._stat.joints
             
+            # Opcionális stat mezők (a stat objektum élettartama alatt állandó)
+            self._has_total_lines = hasattr(self._stat, 'total_lines')
+            self._has_spindle = bool(getattr(self._stat, 'spindle', None))
+            
             # Capabilities beállítása
             await self._setup_capabilities()
             
@@ -188,35 +229,33 @@ class LinuxCNCDevice(JogSafeDeviceDriver):
     async def _parse_ini_file(self) -> None:
         """INI fájl feldolgozása a capabilities-hez"""
         try:
-            import configparser
-            config = configparser.ConfigParser()
-            config.read(self.ini_file)
+            text = await asyncio.to_thread(Path(self.ini_file).read_text)
+            config = _fast_parse_ini(text)
             
             # Munkatér méretek
             work_envelope = {}
             for axis in ["X", "Y", "Z"]:
-                axis_section = f"AXIS_{axis}"
-                if config.has_section(axis_section):
-                    if config.has_option(axis_section, "MAX_LIMIT"):
-                        max_val = config.getfloat(axis_section, "MAX_LIMIT")
-                        min_val = config.getfloat(axis_section, "MIN_LIMIT", fallback=0)
-                        work_envelope[axis.lower()] = max_val - min_val
+                axis_section = config.get(f"AXIS_{axis}")
+                if axis_section and "MAX_LIMIT" in axis_section:
+                    max_val = float(axis_section["MAX_LIMIT"])
+                    min_val = float(axis_section.get("MIN_LIMIT", 0))
+                    work_envelope[axis.lower()] = max_val - min_val
             
             if work_envelope:
                 self._capabilities.work_envelope = work_envelope
             
             # Max sebesség
-            if config.has_section("TRAJ"):
-                if config.has_option("TRAJ", "MAX_LINEAR_VELOCITY"):
-                    max_vel = config.getfloat("TRAJ", "MAX_LINEAR_VELOCITY")
-                    self._capabilities.max_feed_rate = max_vel * 60  # mm/s -> mm/min
+            traj = config.get("TRAJ", {})
+            if "MAX_LINEAR_VELOCITY" in traj:
+                max_vel = float(traj["MAX_LINEAR_VELOCITY"])
+                self._capabilities.max_feed_rate = max_vel * 60  # mm/s -> mm/min
             
             # Spindle
-            if config.has_section("SPINDLE_0"):
-                if config.has_option("SPINDLE_0", "MAX_FORWARD_VELOCITY"):
-                    self._capabilities.max_spindle_speed = config.getfloat(
-                        "SPINDLE_0", "MAX_FORWARD_VELOCITY"
-                    )
+            spindle = config.get("SPINDLE_0", {})
+            if "MAX_FORWARD_VELOCITY" in spindle:
+                self._capabilities.max_spindle_speed = float(
+                    spindle["MAX_FORWARD_VELOCITY"]
+                )
                     
         except Exception:
             pass  # Ha nem sikerül, maradnak az alapértékek
@@ -226,7 +265,29 @@ class LinuxCNCDevice(JogSafeDeviceDriver):
     # =========================================
     
     async def get_status(self) -> DeviceStatus:
-        """Aktuális állapot lekérdezése (non-blocking)"""
+        """
+        Aktuális állapot lekérdezése (non-blocking).
+        
+        Ha már fut egy lekérdezés, a hívó annak eredményére vár, így egy
+        időpillanatban legfeljebb egy NML kör fut (polling loop + UI/REST).
+        """
+        if not self._stat:
+            return self._status
+        
+        if self._inflight_status is None:
+            self._inflight_status = asyncio.ensure_future(self._poll_status_once())
+            self._inflight_status.add_done_callback(self._clear_inflight_status)
+        
+        # shield: egy megszakított hívó ne szakítsa meg a közös pollt
+        return await asyncio.shield(self._inflight_status)
+    
+    def _clear_inflight_status(self, future: asyncio.Future) -> None:
+        """Befejezett single-flight poll törlése"""
+        if self._inflight_status is future:
+            self._inflight_status = None
+    
+    async def _poll_status_once(self) -> DeviceStatus:
+        """Egy tényleges állapot lekérdezés a LinuxCNC-ből"""
         if not self._stat:
             return self._status
         
@@ -259,16 +320,17 @@ class LinuxCNCDevice(JogSafeDeviceDriver):
             
             # Feed és spindle
             self._status.feed_rate = self._stat.current_vel * 60  # units/s -> units/min
-            self._status.spindle_speed = abs(self._stat.spindle[0]['speed']) if self._stat.spindle else 0.0
+            spindle = self._stat.spindle[0] if self._has_spindle else None
+            self._status.spindle_speed = abs(spindle['speed']) if spindle else 0.0
             
             # Override értékek
             self._status.feed_override = self._stat.feedrate * 100
-            self._status.spindle_override = self._stat.spindle[0]['override'] * 100 if self._stat.spindle else 100.0
+            self._status.spindle_override = spindle['override'] * 100 if spindle else 100.0
             
             # Program info
             self._status.current_file = self._stat.file or None
             self._status.current_line = self._stat.current_line
-            self._status.total_lines = self._stat.total_lines if hasattr(self._stat, 'total_lines') else 0
+            self._status.total_lines = self._stat.total_lines if self._has_total_lines else 0
             
             if self._status.total_lines > 0:
                 self._status.progress = (self._status.current_line / self._status.total_lines) * 100
@@ -733,22 +795,56 @@ class LinuxCNCDevice(JogSafeDeviceDriver):
         position: Optional[Position] = None,
     ) -> bool:
         """Munkadarab nullpont beállítása"""
-        # G54=1, G55=2, ..., G59.3=9
-        offset_map = {
-            "G54": 1, "G55": 2, "G56": 3, "G57": 4,
-            "G58": 5, "G59": 6, "G59.1": 7, "G59.2": 8, "G59.3": 9,
-        }
-        
-        offset_num = offset_map.get(offset_id.upper())
-        if offset_num is None:
-            return False
-        
-        if position is None:
-            # Aktuális pozíció nullázása
-            await self.send_gcode(f"G10 L20 P{offset_num} X0 Y0 Z0")
-        else:
-            await self.send_gcode(
-                f"G10 L20 P{offset_num} X{position.x} Y{position.y} Z{position.z}"
-            )
+        results = await self.set_work_offsets_batch([(offset_id, position)])
+        return results[0]
+    
+    async def set_work_offsets_batch(
+        self,
+        items: List[Tuple[str, Optional[Position]]],
+    ) -> List[bool]:
+        """
+        Több munkadarab nullpont beállítása egy MDI menetben.
+        
+        Az enable + MDI módváltás és a wait_complete csak egyszer fut le
+        a teljes batch-re, nem offsetenként.
+        
+        Args:
+            items: (offset_id, position) párok; position=None az aktuális
+                pozíció nullázása
+            
+        Returns:
+            List[bool]: tételenkénti eredmény (False = ismeretlen offset,
+                nincs kapcsolat, vagy a batch hibával / timeouttal zárult)
+        """
+        results = [False] * len(items)
+        commands = []
+        for index, (offset_id, position) in enumerate(items):
+            offset_num = self.WORK_OFFSET_MAP.get(offset_id.upper())
+            if offset_num is None:
+                continue
+            if position is None:
+                # Aktuális pozíció nullázása
+                gcode = f"G10 L20 P{offset_num} X0 Y0 Z0"
+            else:
+                gcode = f"G10 L20 P{offset_num} X{position.x} Y{position.y} Z{position.z}"
+            commands.append((index, gcode))
         
-        return True
+        if not commands or not self._command:
+            return results
+        
+        try:
+            await self._ensure_enabled()
+            await self._ensure_mode(linuxcnc.MODE_MDI)
+            
+            for _, gcode in commands:
+                await asyncio.to_thread(self._command.mdi, gcode)
+            
+            # Sikeres csak akkor, ha a teljes batch lefutott
+            if not await self._wait_complete():
+                return results
+        except linuxcnc.error:
+            return results
+        
+        for index, _ in commands:
+            results[index] = True
+        return results
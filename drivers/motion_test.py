@@ -14,12 +14,16 @@ Használat:
   Importálva: from motion_test import MotionTest
 """
 
+import os
 import sys
 import time
+import select
 import re
 import argparse
 import json
 import threading
+import math
+from collections import defaultdict, deque
 from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
@@ -75,11 +79,30 @@ class MotionTest:
     Mozgásminőség teszt - különböző sebességekkel teszteli a mozgást.
     """
 
+    # Legacy firmware sikeres mozgás válasz: gyors előszűrés a jelölőre,
+    # megerősítés a teljes mintával (X/Y/Z értékekkel)
+    MOVE_MARKER = "MOVE"
     MOVE_PATTERN = re.compile(
         r"INFO:\s*LINEAR\s*MOVE:\s*X(-?\d+\.?\d*)\s*Y(-?\d+\.?\d*)\s*Z(-?\d+\.?\d*)"
     )
     ERROR_PATTERN = re.compile(r"ERROR|COMMAND NOT RECOGNIZED", re.IGNORECASE)
     STATUS_PATTERN = re.compile(r"<([^,>]+)")
+    # Válasz-lezáró sor előtagok (_read_response, nagybetűsítve vizsgálva)
+    _TAGS = ("INFO:", "ERROR:")
+
+    # Ennyi karakternyi sort gyűjtünk egy válaszból (napló / riport)
+    RESPONSE_CAP = 200
+
+    # Egy blokkoló read_until() leghosszabb ideje (stop_event reakcióidő)
+    READ_SLICE_S = 0.1
+
+    # Abszolút G1 parancs sablonok tengelyenként (oda / vissza)
+    _FWD_TMPL = {
+        "X": "G1 X{a:.2f} Y0.00 Z0.00 F{f}",
+        "Y": "G1 X0.00 Y{a:.2f} Z0.00 F{f}",
+        "Z": "G1 X0.00 Y0.00 Z{a:.2f} F{f}",
+    }
+    _BACK_CMD = "G1 X0.00 Y0.00 Z0.00 F{f}"
 
     # Tesztelt sebességek
     DEFAULT_SPEEDS = [5, 10, 20, 30, 50, 70, 100]
@@ -98,9 +121,16 @@ class MotionTest:
         self.timeout = timeout
         self.test_angle = test_angle
         self.speeds = speeds or self.DEFAULT_SPEEDS
+        # Visszamozgás parancsok sebességenként (csak F-től függenek)
+        self._back_cmds = {s: self._BACK_CMD.format(f=s) for s in self.speeds}
         self._serial: Optional[serial.Serial] = None
         self._stop_event = stop_event or threading.Event()
-        self._log_entries: List[dict] = []
+        # deque: hosszú futásnál nincs lista-átméretezés; a bridge szálbiztos
+        # pillanatképet olvas belőle (list(...))
+        self._log_entries: deque = deque()
+        # Csak akkor naplózunk, ha van olvasója (bridge test-progress);
+        # a CLI futás ezt nem használja
+        self._log_enabled = False
         self._start_time: float = 0.0
 
     # ----------------------------------------------------------
@@ -109,8 +139,11 @@ class MotionTest:
 
     def _log(self, entry_type: str, msg: str, **kwargs):
         """Progress napló bejegyzés hozzáadása"""
+        if not self._log_enabled:
+            return
         entry = {
-            "t": round(time.perf_counter() - self._start_time, 2),
+            # nyers float - kerekítés csak kiszolgáláskor (bridge test-progress)
+            "t": time.perf_counter() - self._start_time,
             "type": entry_type,
             "msg": msg,
         }
@@ -121,89 +154,164 @@ class MotionTest:
     # Soros kommunikáció
     # ----------------------------------------------------------
 
-    def _send_timed(self, command: str, wait: float = 8.0) -> Tuple[str, float]:
-        """Parancs küldése, válasz + idő mérése"""
+    def _send_timed(self, command: str, wait: float = 8.0) -> Tuple[str, str, float]:
+        """
+        Parancs küldése, válasz + idő mérése.
+
+        Returns:
+            (teljes válasz, RESPONSE_CAP-re vágott válasz, eltelt idő ms)
+        """
         if not self._serial or not self._serial.is_open:
-            return "", 0.0
+            return "", "", 0.0
         if self._stop_event.is_set():
-            return "", 0.0
+            return "", "", 0.0
 
         self._serial.reset_input_buffer()
-        cmd = command.strip() + "\r\n"
+        command = command.strip()
 
-        start = time.perf_counter()
-        self._serial.write(cmd.encode())
+        _now = time.perf_counter
+        start = _now()
+        self._serial.write((command + "\r\n").encode())
         self._serial.flush()
 
         response = self._read_response(wait)
-        elapsed_ms = (time.perf_counter() - start) * 1000.0
-
-        self._log("cmd", command.strip(),
-                  gcode=command.strip(),
-                  response=(response or "")[:200],
-                  ms=round(elapsed_ms, 1))
-        return response, elapsed_ms
-
-    def _send(self, command: str, wait: float = 2.0) -> str:
-        """Parancs küldése"""
-        resp, _ = self._send_timed(command, wait)
-        return resp
+        elapsed_ms = (_now() - start) * 1000.0
+        response_short = response[:self.RESPONSE_CAP]
+
+        if self._log_enabled:
+            self._log("cmd", command,
+                      gcode=command,
+                      response=response_short,
+                      ms=round(elapsed_ms, 1))
+        return response, response_short, elapsed_ms
+
+    def _serial_fd(self) -> Optional[int]:
+        """A soros port fájlleírója (POSIX), vagy None ha nem elérhető"""
+        try:
+            fd = self._serial.fileno()
+        except Exception:
+            return None
+        return fd if isinstance(fd, int) and fd >= 0 else None
 
     def _read_response(self, timeout: float = 8.0) -> str:
-        """Válasz olvasása (stop_event-et is figyeli)"""
+        """
+        Válasz olvasása (stop_event-et is figyeli).
+
+        POSIX alatt közvetlenül a port fájlleíróján várunk select()-tel és
+        os.read()-del olvasunk nagy blokkokban (nincs pyserial timeout
+        átállítás / tcsetattr). Más platformon az első bájtra a pyserial
+        read(1) vár, utána a már beérkezett adatot egyetlen
+        read(in_waiting) hívással olvassuk ki. A beérkezett teljes sorokat
+        egyben dekódoljuk (splitlines). Egy várakozás legfeljebb
+        READ_SLICE_S, hogy a stop_event gyorsan érvényesüljön.
+        A gyűjtött szöveg RESPONSE_CAP körül korlátos, a lezáró sor mindig benne van.
+        """
         if not self._serial:
             return ""
 
+        _now = time.perf_counter
         lines = []
-        deadline = time.perf_counter() + timeout
-
-        while time.perf_counter() < deadline:
-            if self._stop_event.is_set():
-                break
-            if self._serial.in_waiting > 0:
+        total = 0
+        pending = bytearray()
+        done = False
+        deadline = _now() + timeout
+        fd = self._serial_fd()
+        saved_timeout = self._serial.timeout
+
+        try:
+            while not done and not self._stop_event.is_set():
+                remaining = deadline - _now()
+                if remaining <= 0:
+                    break
+                read_timeout = min(remaining, self.READ_SLICE_S)
                 try:
-                    line_bytes = self._serial.readline()
-                    line = line_bytes.decode(errors='replace').strip()
-                    if line:
-                        lines.append(line)
-                        # Legacy firmware: INFO/ERROR
-                        # GRBL: ok / error:n / <Idle,...> státusz
-                        if re.match(r"^(INFO|ERROR):", line, re.IGNORECASE):
-                            break
-                        if re.match(r"^ok$", line, re.IGNORECASE):
-                            break
-                        if re.match(r"^error", line, re.IGNORECASE):
-                            break
-                        if line.startswith("<") and line.endswith(">"):
-                            break
+                    if fd is not None:
+                        ready, _, _ = select.select([fd], [], [], read_timeout)
+                        if not ready:
+                            continue
+                        chunk = os.read(fd, 4096)
+                        if not chunk:
+                            break  # eszköz lecsatlakozott
+                        pending += chunk
+                    else:
+                        if self._serial.timeout != read_timeout:
+                            self._serial.timeout = read_timeout
+                        chunk = self._serial.read(1)
+                        if not chunk:
+                            continue
+                        pending += chunk
+                        waiting = self._serial.in_waiting
+                        if waiting:
+                            pending += self._serial.read(waiting)
                 except Exception:
                     break
-            else:
-                time.sleep(0.02)
+
+                # Csak a teljes sorokat dolgozzuk fel, a maradék a következő
+                # olvasásra vár
+                end = pending.rfind(b"\n")
+                if end < 0:
+                    continue
+                text = pending[:end + 1].decode(errors='replace')
+                del pending[:end + 1]
+
+                for raw in text.splitlines():
+                    line = raw.strip()
+                    if not line:
+                        continue
+
+                    # Legacy firmware: INFO/ERROR
+                    # GRBL: ok / error:n / <Idle,...> státusz
+                    head = line[:6].upper()
+                    done = (
+                        head.startswith(self._TAGS)
+                        or head.startswith("ERROR")   # GRBL error:n
+                        or head == "OK"
+                        or (line.startswith("<") and line.endswith(">"))
+                    )
+                    # A limit feletti bőbeszédű sorokat eldobjuk, a lezáró
+                    # sort viszont mindig megtartjuk (sikerdetektálás)
+                    if done or total < self.RESPONSE_CAP:
+                        lines.append(line)
+                        total += len(line) + 1
+                    if done:
+                        break
+        finally:
+            if self._serial.timeout != saved_timeout:
+                self._serial.timeout = saved_timeout
+
+        # Lezáratlan maradék sor (timeout) - ne vesszen el
+        tail = pending.decode(errors='replace').strip()
+        if not done and tail and total < self.RESPONSE_CAP:
+            lines.append(tail)
 
         return "\n".join(lines)
 
+    def _is_legacy_move(self, response: str) -> bool:
+        """Legacy 'INFO: LINEAR MOVE: X.. Y.. Z..' válasz-e (jelölő, majd minta)"""
+        return self.MOVE_MARKER in response and self.MOVE_PATTERN.search(response) is not None
+
     def _wait_grbl_idle(self, timeout: float = 15.0, poll_interval: float = 0.1) -> Tuple[bool, float]:
         """GRBL státusz pollinggal megvárja az Idle állapotot."""
-        start = time.perf_counter()
+        _now = time.perf_counter
+        start = _now()
         deadline = start + timeout
 
-        while time.perf_counter() < deadline:
+        while _now() < deadline:
             if self._stop_event.is_set():
                 break
 
-            status, _ = self._send_timed("?", wait=0.6)
+            status, _, _ = self._send_timed("?", wait=0.6)
             state_match = self.STATUS_PATTERN.search(status)
             if state_match:
                 state = state_match.group(1).strip().lower()
                 if state.startswith("idle"):
-                    return True, (time.perf_counter() - start) * 1000.0
+                    return True, (_now() - start) * 1000.0
                 if state.startswith("alarm") or state.startswith("door"):
-                    return False, (time.perf_counter() - start) * 1000.0
+                    return False, (_now() - start) * 1000.0
 
             time.sleep(poll_interval)
 
-        return False, (time.perf_counter() - start) * 1000.0
+        return False, (_now() - start) * 1000.0
 
     # ----------------------------------------------------------
     # Teszt futtatás
@@ -230,19 +338,22 @@ class MotionTest:
 
         self._log("info", f"Mozgásminőség teszt indítása (szög: {self.test_angle}°, sebességek: {len(self.speeds)})")
 
-        print(f"\n{'='*60}")
-        print("  MOZGÁSMINŐSÉG TESZT")
-        print(f"{'='*60}")
-        print(f"  Port:        {self.port}")
-        print(f"  Teszt szög:  {self.test_angle}°")
-        print(f"  Sebességek:  {', '.join(f'F{s}' for s in self.speeds)}")
-        print(f"  Tengelyek:   {', '.join(test_axes)}")
-        print(f"{'-'*60}")
+        out = [
+            f"\n{'='*60}",
+            "  MOZGÁSMINŐSÉG TESZT",
+            f"{'='*60}",
+            f"  Port:        {self.port}",
+            f"  Teszt szög:  {self.test_angle}°",
+            f"  Sebességek:  {', '.join(f'F{s}' for s in self.speeds)}",
+            f"  Tengelyek:   {', '.join(test_axes)}",
+            f"{'-'*60}",
+        ]
+        sys.stdout.write("\n".join(out) + "\n")
 
         # Pozíció nullázás
         self._log("info", "Pozíció nullázása...")
         print("\n  [0] Pozíció nullázása...")
-        self._send("G92 X0 Y0 Z0", wait=1.0)
+        self._send_timed("G92 X0 Y0 Z0", wait=1.0)
         print("      OK")
 
         # Teszt végigfuttatása
@@ -283,25 +394,50 @@ class MotionTest:
                     f"átlag={result.avg_time_ms:.0f}ms"
                 )
 
-                # Szünet a mozgások között
-                time.sleep(0.3)
+                # Szünet a mozgások között (leállításra azonnal megszakad)
+                if self._stop_event.wait(0.3):
+                    cancelled = True
+                    break
+
+        # Összesítés sebességenként (egyetlen csoportosító menet)
+        groups: Dict[int, List[SpeedTestResult]] = defaultdict(list)
+        for r in report.results:
+            if r.response_ok:
+                groups[r.speed].append(r)
 
-        # Összesítés sebességenként
+        working_speeds: List[int] = []
         for speed in self.speeds:
-            speed_results = [r for r in report.results if r.speed == speed and r.response_ok]
-            if speed_results:
-                avg = sum(r.avg_time_ms for r in speed_results) / len(speed_results)
-                report.speed_summary[speed] = {
-                    "avg_time_ms": round(avg, 1),
-                    "min_time_ms": round(min(r.avg_time_ms for r in speed_results), 1),
-                    "max_time_ms": round(max(r.avg_time_ms for r in speed_results), 1),
-                    "all_ok": all(r.response_ok for r in speed_results),
-                    "tests": len(speed_results),
-                }
-
-        # Ajánlott sebesség meghatározása
-        # Keressük a legjobb sebesség/idő arányt ahol minden működik
-        report.recommended_speed = self._find_recommended_speed(report)
+            speed_results = groups.get(speed)
+            if not speed_results:
+                continue
+            total = 0.0
+            min_ms = math.inf
+            max_ms = -math.inf
+            all_ok = True
+            for r in speed_results:
+                t = r.avg_time_ms
+                total += t
+                if t < min_ms:
+                    min_ms = t
+                if t > max_ms:
+                    max_ms = t
+                all_ok = all_ok and r.response_ok
+            report.speed_summary[speed] = {
+                "avg_time_ms": round(total / len(speed_results), 1),
+                "min_time_ms": round(min_ms, 1),
+                "max_time_ms": round(max_ms, 1),
+                "all_ok": all_ok,
+                "tests": len(speed_results),
+            }
+            if all_ok:
+                working_speeds.append(speed)
+
+        # Ajánlott sebesség: a működő sebességek közül a középső
+        # (--speeds tetszőleges sorrendben is megadható, ezért rendezünk)
+        working_speeds.sort()
+        report.recommended_speed = (
+            working_speeds[len(working_speeds) // 2] if working_speeds else None
+        )
 
         report.completed = not cancelled
         if cancelled:
@@ -312,21 +448,24 @@ class MotionTest:
                   pct=100)
 
         # Kiírás
-        print(f"\n{'='*60}")
-        print("  ÖSSZESÍTÉS")
-        print(f"{'='*60}")
+        out = [
+            f"\n{'='*60}",
+            "  ÖSSZESÍTÉS",
+            f"{'='*60}",
+        ]
         for speed, summary in report.speed_summary.items():
             status = "✅" if summary["all_ok"] else "⚠️"
             rec = " ← AJÁNLOTT" if speed == report.recommended_speed else ""
-            print(
+            out.append(
                 f"  {status} F{speed:3d}: átlag {summary['avg_time_ms']:7.1f}ms "
                 f"(min: {summary['min_time_ms']:.1f}, max: {summary['max_time_ms']:.1f}){rec}"
             )
 
         if report.recommended_speed:
-            print(f"\n  🎯 Ajánlott sebesség: F{report.recommended_speed}")
-        print(f"  ⏱️  Időtartam: {report.duration_seconds:.1f} mp")
-        print(f"{'='*60}")
+            out.append(f"\n  🎯 Ajánlott sebesség: F{report.recommended_speed}")
+        out.append(f"  ⏱️  Időtartam: {report.duration_seconds:.1f} mp")
+        out.append(f"{'='*60}")
+        sys.stdout.write("\n".join(out) + "\n")
 
         return report
 
@@ -335,14 +474,13 @@ class MotionTest:
         angle = self.test_angle
 
         # Abszolút mozgás az adott szögre
-        axes = {"X": 0.0, "Y": 0.0, "Z": 0.0}
-        axes[axis] = angle
-        cmd = f"G1 X{axes['X']:.2f} Y{axes['Y']:.2f} Z{axes['Z']:.2f} F{speed}"
+        cmd = self._FWD_TMPL[axis].format(a=angle, f=speed)
 
         # Oda
-        resp_fwd, time_fwd = self._send_timed(cmd, wait=15.0)
-        is_legacy_move = bool(self.MOVE_PATTERN.search(resp_fwd))
-        is_grbl_ok = ("ok" in resp_fwd.lower()) and not bool(self.ERROR_PATTERN.search(resp_fwd))
+        resp_fwd, resp_fwd_short, time_fwd = self._send_timed(cmd, wait=15.0)
+        resp_fwd_u = resp_fwd.upper()
+        is_legacy_move = self._is_legacy_move(resp_fwd)
+        is_grbl_ok = ("OK" in resp_fwd_u) and not bool(self.ERROR_PATTERN.search(resp_fwd))
         ok_fwd = is_legacy_move or is_grbl_ok
 
         # GRBL esetben az "ok" csak parancs-ack, mozgás végét Idle státusz jelzi
@@ -351,13 +489,15 @@ class MotionTest:
             time_fwd += idle_ms
             ok_fwd = ok_fwd and idle_ok
 
-        time.sleep(0.2)
+        # Rövid szünet visszaút előtt (stop esetén a _send_timed úgyis kilép)
+        self._stop_event.wait(0.2)
 
         # Vissza
-        cmd_back = f"G1 X0.00 Y0.00 Z0.00 F{speed}"
-        resp_back, time_back = self._send_timed(cmd_back, wait=15.0)
-        is_legacy_back = bool(self.MOVE_PATTERN.search(resp_back))
-        is_grbl_back_ok = ("ok" in resp_back.lower()) and not bool(self.ERROR_PATTERN.search(resp_back))
+        cmd_back = self._back_cmds[speed]
+        resp_back, _, time_back = self._send_timed(cmd_back, wait=15.0)
+        resp_back_u = resp_back.upper()
+        is_legacy_back = self._is_legacy_move(resp_back)
+        is_grbl_back_ok = ("OK" in resp_back_u) and not bool(self.ERROR_PATTERN.search(resp_back))
         ok_back = is_legacy_back or is_grbl_back_ok
 
         if is_grbl_back_ok and not is_legacy_back:
@@ -375,27 +515,9 @@ class MotionTest:
             return_time_ms=time_back,
             avg_time_ms=avg,
             response_ok=ok_fwd and ok_back,
-            response=resp_fwd[:200],
+            response=resp_fwd_short,
         )
 
-    def _find_recommended_speed(self, report: MotionTestReport) -> Optional[int]:
-        """
-        Ajánlott sebesség meghatározása.
-        Szempont: közepes sebesség, ahol minden teszt sikeres volt.
-        """
-        working_speeds = [
-            speed for speed, summary in report.speed_summary.items()
-            if summary["all_ok"]
-        ]
-
-        if not working_speeds:
-            return None
-
-        # A közepes sebesség ajánlott (a működők közül)
-        working_speeds.sort()
-        mid_idx = len(working_speeds) // 2
-        return working_speeds[mid_idx]
-
     def run_with_serial(
         self,
         ser: serial.Serial,
@@ -407,6 +529,7 @@ class MotionTest:
         A bridge server hívja.
         """
         self._serial = ser
+        self._log_enabled = True
         if stop_event is not None:
             self._stop_event = stop_event
         report = self.run_test(axes)
@@ -418,6 +541,31 @@ class MotionTest:
 # CLI
 # ============================================================
 
+def _wait_device_ready(ser: "serial.Serial", timeout: float = 3.0) -> bool:
+    """
+    Megvárja a firmware indulási üzenetét (INFO:/ERROR: vagy GRBL banner)
+    a vak várakozás helyett. Legfeljebb `timeout` másodpercig vár, utána
+    a bemeneti puffert üríti.
+    """
+    saved_timeout = ser.timeout
+    ser.timeout = 0.1
+    ready = False
+    deadline = time.perf_counter() + timeout
+    try:
+        while time.perf_counter() < deadline:
+            line = ser.readline().strip()
+            if line.startswith((b"INFO:", b"ERROR:", b"Grbl")):
+                ready = True
+                break
+    finally:
+        ser.timeout = saved_timeout
+
+    # A banner utáni maradék (pl. további INFO sorok) eldobása
+    if ser.in_waiting:
+        ser.read(ser.in_waiting)
+    return ready
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Motion Quality Test - Mozgásminőség és sebesség teszt",
@@ -449,10 +597,8 @@ def main():
         print(f"HIBA: Nem sikerült megnyitni: {e}")
         sys.exit(1)
 
-    print("Várakozás Arduino inicializálásra (3 mp)...")
-    time.sleep(3.0)
-    if ser.in_waiting:
-        ser.read(ser.in_waiting)
+    print("Várakozás Arduino inicializálásra (max 3 mp)...")
+    _wait_device_ready(ser, timeout=3.0)
 
     test = MotionTest(
         port=args.port,
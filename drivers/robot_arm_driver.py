@@ -22,6 +22,7 @@ Tengely elnevezés:
 """
 
 import asyncio
+import functools
 import re
 from typing import Optional, List, Dict, Any
 from enum import Enum
@@ -65,6 +66,8 @@ except ImportError:
 try:
     from kinematics import (
         inverse_kinematics,
+        inverse_kinematics_branches,
+        select_ik_solution,
         forward_kinematics,
         RobotConfig,
         JointAngles,
@@ -101,6 +104,12 @@ except ImportError:
     def inverse_kinematics(x, y, z, config):
         return JointAngles(0, 0, 0)
     
+    def inverse_kinematics_branches(x, y, z, config):
+        return (JointAngles(0, 0, 0),)
+    
+    def select_ik_solution(solutions, seed=None, config=None):
+        return solutions[0]
+    
     logger.warning("⚠️ kinematics modul nem elérhető - csak Joint mód használható")
 
 
@@ -145,6 +154,17 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
     
     WELCOME_MSG = "Connected, please calibrate the mechanical coordinates"
     
+    # Program vége szinkron: G4 P0 nyugtája csak a planner puffer kiürülése
+    # (az utolsó mozgás befejezése) után jön - ennyi ideig várunk rá (s)
+    PROGRAM_END_SYNC_TIMEOUT = 60.0
+    
+    # IK/FK eredmény LRU cache (ismétlődő jog célpontok, álló status poll).
+    # Kulcs a bemenet kerekítve - 2 tizedes = a kiküldött G-code felbontása.
+    KINEMATICS_CACHE_SIZE = 1024
+    KINEMATICS_CACHE_DIGITS = 2
+    # Elérhetőségi előszűrés ráhagyása (mm)
+    REACH_TOLERANCE = 0.5
+    
     # Tengely mapping (identity - config már X/Y/Z-t használ)
     AXIS_MAP = {'X': 'X', 'Y': 'Y', 'Z': 'Z'}
     
@@ -213,6 +233,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                 self._robot_config = None
         else:
             self._robot_config = robot_config
+        self._rebuild_kinematics_cache()
         
         # Vezérlési mód
         self._control_mode = ControlMode.JOINT
@@ -230,6 +251,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
         
         self._axis_invert = axis_invert if axis_invert else {}
         self._axis_scale = axis_scale if axis_scale else {}
+        self._rebuild_axis_cache()
         self._axis_limits: Dict[str, tuple] = {}
         if axis_limits:
             for axis, limits in axis_limits.items():
@@ -301,8 +323,9 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
             
             # Várakozás az inicializálásra - iteratív polling
             welcome = ""
-            start = asyncio.get_event_loop().time()
-            while asyncio.get_event_loop().time() - start < 3.0:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + 3.0
+            while loop.time() < deadline:
                 await asyncio.sleep(0.2)
                 if self._serial.in_waiting:
                     chunk_bytes = await asyncio.to_thread(
@@ -406,9 +429,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
         z = self._home_position_config.get('Z', 0.0)
         
         # GRBL koordináták (invertálva ha szükséges)
-        grbl_x = -x if self._axis_invert.get('X', False) else x
-        grbl_y = -y if self._axis_invert.get('Y', False) else y
-        grbl_z = -z if self._axis_invert.get('Z', False) else z
+        grbl_x, grbl_y, grbl_z = self._apply_invert(x, y, z)
         
         if mode == 'query':
             # Firmware pozíció elfogadása - lekérdezzük és azt használjuk
@@ -439,6 +460,68 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
             self._status.position = Position(x=x, y=y, z=z)
             self._status.work_position = Position(x=x, y=y, z=z)
     
+    def _rebuild_axis_cache(self) -> None:
+        """Invertálásból származtatott előjelek (±1) újraszámolása.
+        
+        Az _axis_invert minden módosítása után hívandó.
+        """
+        self._invert_sign = tuple(
+            -1 if self._axis_invert.get(axis, False) else 1 for axis in 'XYZ'
+        )
+    
+    def _apply_invert(self, x: float, y: float, z: float) -> tuple:
+        """Invertálás (logikai <-> GRBL, mindkét irányban ugyanaz) szorzással"""
+        sx, sy, sz = self._invert_sign
+        return (x * sx, y * sy, z * sz)
+    
+    def _rebuild_kinematics_cache(self) -> None:
+        """IK/FK LRU cache újraépítése az aktuális _robot_config-hoz.
+        
+        A _robot_config cseréje után hívandó - a régi bejegyzések a régi
+        méretekkel számolódtak, ezért az egész cache eldobásra kerül.
+        """
+        config = self._robot_config
+        # Elérhetőségi héj a vállízület körül (négyzetes határok, sqrt nélkül)
+        # (az IK a határon clampel, ezért REACH_TOLERANCE mm ráhagyással)
+        if config is not None:
+            tol = self.REACH_TOLERANCE
+            r_min = max(0.0, abs(config.L2 - config.L3) - tol)
+            r_max = config.L2 + config.L3 + tol
+            self._reach_sq = (r_min * r_min, r_max * r_max)
+            self._shoulder_z = config.L1
+        else:
+            self._reach_sq = (0.0, float('inf'))
+            self._shoulder_z = 0.0
+        cache = functools.lru_cache(maxsize=self.KINEMATICS_CACHE_SIZE)
+        self._ik_cached = cache(lambda x, y, z: inverse_kinematics_branches(x, y, z, config))
+        self._fk_cached = cache(lambda j1, j2, j3: forward_kinematics(j1, j2, j3, config))
+    
+    def _is_reachable(self, x: float, y: float, z: float) -> bool:
+        """Gyors előszűrés: a célpont a váll körüli [|L2-L3|, L2+L3] héjon belül van-e"""
+        h = z - self._shoulder_z
+        d_sq = x * x + y * y + h * h
+        return self._reach_sq[0] <= d_sq <= self._reach_sq[1]
+    
+    def _inverse_kinematics(self, x: float, y: float, z: float) -> JointAngles:
+        """Cache-elt IK (x/y/z mm kerekítve KINEMATICS_CACHE_DIGITS tizedesre)
+        
+        Mindkét könyök ág cache-elve van; a választás seed-je az utolsó
+        joint pozíció (_joint_position, ennek hiányában a status), így a kar
+        nem billen át a másik ágra.
+        """
+        d = self.KINEMATICS_CACHE_DIGITS
+        branches = self._ik_cached(round(x, d), round(y, d), round(z, d))
+        seed = self._joint_position
+        if seed is None:
+            pos = self._status.position
+            seed = JointAngles(j1=pos.x, j2=pos.y, j3=pos.z)
+        return select_ik_solution(branches, seed, self._robot_config)
+    
+    def _forward_kinematics(self, j1: float, j2: float, j3: float) -> CartesianPosition:
+        """Cache-elt FK (szögek kerekítve KINEMATICS_CACHE_DIGITS tizedesre)"""
+        d = self.KINEMATICS_CACHE_DIGITS
+        return self._fk_cached(round(j1, d), round(j2, d), round(j3, d))
+    
     def get_home_position_config(self) -> Dict[str, Any]:
         """Home pozíció konfiguráció lekérdezése."""
         return self._home_position_config.copy()
@@ -470,6 +553,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
         if axis_invert is not None:
             old_invert = self._axis_invert.copy() if self._axis_invert else {}
             self._axis_invert = axis_invert
+            self._rebuild_axis_cache()
             inverted = [k for k, v in axis_invert.items() if v]
             if inverted:
                 logger.info(f"🔄 Invertált tengelyek: {', '.join(inverted)}")
@@ -562,32 +646,34 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
         Dinamikus limiteket használ, ha konfigurálva vannak.
         """
         clamped = {}
+        get_limits = self._get_dynamic_limits
+        
+        # Tipikus eset: minden tengely a határokon belül - egyetlen
+        # láncolt összehasonlítás tengelyenként, elágazás csak ha kilóg
+        lo_x, hi_x = get_limits('X')
+        lo_y, hi_y = get_limits('Y')
+        # Z tengely (általában Y-tól függ)
+        lo_z, hi_z = get_limits('Z')
+        if lo_x <= x <= hi_x and lo_y <= y <= hi_y and lo_z <= z <= hi_z:
+            return (x, y, z, clamped)
         
-        # X tengely (általában nincs dinamikus limit)
-        lo, hi = self._get_dynamic_limits('X')
-        if x < lo:
-            x = lo
+        if x < lo_x:
+            x = lo_x
             clamped['X'] = True
-        elif x > hi:
-            x = hi
+        elif x > hi_x:
+            x = hi_x
             clamped['X'] = True
-        
-        # Y tengely
-        lo, hi = self._get_dynamic_limits('Y')
-        if y < lo:
-            y = lo
+        if y < lo_y:
+            y = lo_y
             clamped['Y'] = True
-        elif y > hi:
-            y = hi
+        elif y > hi_y:
+            y = hi_y
             clamped['Y'] = True
-        
-        # Z tengely (általában Y-tól függ)
-        lo, hi = self._get_dynamic_limits('Z')
-        if z < lo:
-            z = lo
+        if z < lo_z:
+            z = lo_z
             clamped['Z'] = True
-        elif z > hi:
-            z = hi
+        elif z > hi_z:
+            z = hi_z
             clamped['Z'] = True
         
         return (x, y, z, clamped)
@@ -646,9 +732,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                     raw_z = wpos.z
                     
                     # Invertálás alkalmazása - a logikai pozíció a nyers érték negáltja
-                    x = -raw_x if self._axis_invert.get('X', False) else raw_x
-                    y = -raw_y if self._axis_invert.get('Y', False) else raw_y
-                    z = -raw_z if self._axis_invert.get('Z', False) else raw_z
+                    x, y, z = self._apply_invert(raw_x, raw_y, raw_z)
                     
                     # Status pozíciók frissítése invertált értékekkel
                     self._status.work_position = Position(x=x, y=y, z=z)
@@ -656,9 +740,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                         raw_mx = mpos.x
                         raw_my = mpos.y
                         raw_mz = mpos.z
-                        mx = -raw_mx if self._axis_invert.get('X', False) else raw_mx
-                        my = -raw_my if self._axis_invert.get('Y', False) else raw_my
-                        mz = -raw_mz if self._axis_invert.get('Z', False) else raw_mz
+                        mx, my, mz = self._apply_invert(raw_mx, raw_my, raw_mz)
                         self._status.position = Position(x=mx, y=my, z=mz)
                     else:
                         self._status.position = Position(x=x, y=y, z=z)
@@ -666,7 +748,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                     # Kinematics a logikai (invertált) pozíciókat használja
                     if KINEMATICS_AVAILABLE:
                         self._joint_position = JointAngles(j1=x, j2=y, j3=z)
-                        self._cartesian_position = forward_kinematics(x, y, z, self._robot_config)
+                        self._cartesian_position = self._forward_kinematics(x, y, z)
                     
                     # Kiterjesztett visszatérési érték - logikai pozíciók
                     status['axes'] = {'x': x, 'y': y, 'z': z}
@@ -686,11 +768,12 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                     # Szoftveres limit kezelés (ha engedélyezve)
                     if self._use_soft_limits:
                         # Dinamikus limitek frissítése a státuszban
-                        self._status.dynamic_limits = {
-                            'X': {'min': self._get_dynamic_limits('X')[0], 'max': self._get_dynamic_limits('X')[1]},
-                            'Y': {'min': self._get_dynamic_limits('Y')[0], 'max': self._get_dynamic_limits('Y')[1]},
-                            'Z': {'min': self._get_dynamic_limits('Z')[0], 'max': self._get_dynamic_limits('Z')[1]},
-                        }
+                        # (tengelyenként egyetlen _get_dynamic_limits hívás)
+                        dynamic_limits = {}
+                        for axis in 'XYZ':
+                            lo, hi = self._get_dynamic_limits(axis)
+                            dynamic_limits[axis] = {'min': lo, 'max': hi}
+                        self._status.dynamic_limits = dynamic_limits
                         
                         # Szoftveres limit ellenőrzés (már logikai pozíciókon)
                         self._update_limit_blocked()
@@ -884,9 +967,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
             z = self._home_position_config.get('Z', 0.0)
             
             # GRBL koordináták (invertálva ha szükséges)
-            grbl_x = -x if self._axis_invert.get('X', False) else x
-            grbl_y = -y if self._axis_invert.get('Y', False) else y
-            grbl_z = -z if self._axis_invert.get('Z', False) else z
+            grbl_x, grbl_y, grbl_z = self._apply_invert(x, y, z)
             
             # Feed rate: 1-100 skála -> tényleges fok/perc
             speed_percent = max(1, min(100, int(feed_rate if feed_rate is not None else 50)))
@@ -1016,9 +1097,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                 clamped_x, clamped_y, clamped_z = x, y, z
             
             # GRBL koordináták (invertálva ha szükséges)
-            grbl_x = -clamped_x if self._axis_invert.get('X', False) else clamped_x
-            grbl_y = -clamped_y if self._axis_invert.get('Y', False) else clamped_y
-            grbl_z = -clamped_z if self._axis_invert.get('Z', False) else clamped_z
+            grbl_x, grbl_y, grbl_z = self._apply_invert(clamped_x, clamped_y, clamped_z)
             
             feed_rate = self._clamp_feed_rate(speed)
             cmd = f"G1 X{grbl_x:.2f} Y{grbl_y:.2f} Z{grbl_z:.2f} F{feed_rate:.0f}"
@@ -1064,9 +1143,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
             z = max(self._joint_limits['Z'][0], min(self._joint_limits['Z'][1], z))
             
             # GRBL koordináták (invertálva ha szükséges)
-            grbl_x = -x if self._axis_invert.get('X', False) else x
-            grbl_y = -y if self._axis_invert.get('Y', False) else y
-            grbl_z = -z if self._axis_invert.get('Z', False) else z
+            grbl_x, grbl_y, grbl_z = self._apply_invert(x, y, z)
             
             feed_rate = self._clamp_feed_rate(speed)
             cmd = f"G1 X{grbl_x:.2f} Y{grbl_y:.2f} Z{grbl_z:.2f} F{feed_rate:.0f}"
@@ -1082,7 +1159,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
             # Pozíció frissítése (logikai koordinátákkal)
             if KINEMATICS_AVAILABLE:
                 self._joint_position = JointAngles(j1=x, j2=y, j3=z)
-                self._cartesian_position = forward_kinematics(x, y, z, self._robot_config)
+                self._cartesian_position = self._forward_kinematics(x, y, z)
             
             return True
             
@@ -1096,8 +1173,12 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
             logger.info("🤖 Cartesian mód nem elérhető - kinematics modul hiányzik")
             return False
         
+        if not self._is_reachable(x, y, z):
+            logger.error(f"🤖 Pozíció a munkaterületen kívül ({x:.1f}, {y:.1f}, {z:.1f})")
+            return False
+        
         try:
-            angles = inverse_kinematics(x, y, z, self._robot_config)
+            angles = self._inverse_kinematics(x, y, z)
             
             if not angles.valid:
                 logger.error(f"🤖 IK hiba: pozíció nem elérhető ({x:.1f}, {y:.1f}, {z:.1f})")
@@ -1201,7 +1282,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
             ax = self._status.position.x
             ay = self._status.position.y
             az = self._status.position.z
-            pos = forward_kinematics(ax, ay, az, self._robot_config)
+            pos = self._forward_kinematics(ax, ay, az)
             x, y, z = pos.x, pos.y, pos.z
             
             if axis == 'X':
@@ -1341,18 +1422,8 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
     async def load_file(self, filepath: str) -> bool:
         """G-code fájl betöltése"""
         try:
-            with open(filepath, "r") as f:
-                lines = f.readlines()
-            
-            self._gcode_lines = []
-            for line in lines:
-                line = line.strip()
-                if ";" in line:
-                    line = line.split(";")[0].strip()
-                if "(" in line:
-                    line = re.sub(r"\([^)]*\)", "", line).strip()
-                if line:
-                    self._gcode_lines.append(line)
+            # Beolvasás és komment/üres sor szűrés szálon (event loop szabad)
+            self._gcode_lines = await asyncio.to_thread(self._read_gcode_file, filepath)
             
             self._current_line_index = 0
             self._status.current_file = filepath
@@ -1390,6 +1461,7 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
         """Program futtatás loop"""
         self._set_state(DeviceState.RUNNING)
         total_lines = len(self._gcode_lines)
+        program = self._encode_gcode_lines(self._gcode_lines)
         
         while self._running and self._current_line_index < total_lines:
             while self._paused:
@@ -1401,7 +1473,10 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                 break
             
             line = self._gcode_lines[self._current_line_index]
-            response = await self._send_command(line)
+            # Nincs soronkénti várakozás: a serial lockot azonnal újra
+            # megfogjuk, a status poll a FIFO lock sorában kap helyet a
+            # sorok között (lásd GrblDeviceBase.STATUS_POLL_MAX_BUSY_SKIPS)
+            response = await self._send_line_bytes(program[self._current_line_index])
             
             if self.ERROR_PATTERN.search(response):
                 error_msg = response.strip()
@@ -1412,8 +1487,6 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                     self._running = False
                     break
             
-            await asyncio.sleep(0.1)
-            
             self._current_line_index += 1
             self._status.current_line = self._current_line_index
             if total_lines > 0:
@@ -1429,6 +1502,15 @@ class RobotArmDevice(GrblDeviceBase, ClosedLoopCapability, TeachingCapability):
                 )
         
         if self._current_line_index >= total_lines:
+            # A sorokat "ok" nyugtára küldjük (nincs fix várakozás), így a
+            # mozgások még futhatnak - GRBL-nél megvárjuk a befejezésüket
+            if self._use_grbl:
+                try:
+                    await self._send_command(
+                        "G4 P0", timeout=self.PROGRAM_END_SYNC_TIMEOUT
+                    )
+                except Exception as e:
+                    logger.warning(f"🤖 Program vége szinkron hiba: {e}")
             self._status.progress = 100.0
             if self.on_job_complete:
                 self.on_job_complete(self._status.current_file or "")
@@ -16,8 +16,18 @@ Protokoll (reverse-engineered):
 """
 
 import asyncio
+import functools
+import logging
+import math
+import os
+import queue
 import re
-from typing import Optional, List, Dict, Any
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import Optional, List, Dict, Any, Tuple, Callable
 from dataclasses import dataclass
 
 try:
@@ -27,6 +37,26 @@ try:
 except ImportError:
     SERIAL_AVAILABLE = False
 
+try:
+    import array
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from log_config import get_logger
+except ImportError:
+    from .log_config import get_logger
+
+logger = get_logger(__name__)
+
 from base import (
     DeviceDriver,
     DeviceType,
@@ -37,6 +67,83 @@ from base import (
 )
 
 
+@functools.lru_cache(maxsize=256)
+def _fmt_move(fw_x: float, fw_y: float, fw_z: float, speed: int) -> bytes:
+    """G1 mozgás parancs bytes (memoizált - tartott jog gombnál ismétlődik).
+    
+    A hívó 2 tizedesre kerekít, hogy az azonos kimenetű célok egy
+    bejegyzésre essenek.
+    """
+    return RobotArmDevice._MOVE_FMT % (fw_x, fw_y, fw_z, speed)
+
+
+def _move_bytes(fw_x: float, fw_y: float, fw_z: float, speed: int) -> bytes:
+    """Kerekítés (+0.0: -0.0 és 0.0 egy kulcs) és a cache-elt formázás hívása"""
+    return _fmt_move(round(fw_x, 2) + 0.0, round(fw_y, 2) + 0.0, round(fw_z, 2) + 0.0, speed)
+
+
+AxisMapper = Callable[[float, float, float], Tuple[float, float, float]]
+
+
+def _make_outgoing_mapper(coeff: Tuple[float, float, float],
+                          perm: Tuple[int, int, int]) -> AxisMapper:
+    """Logikai -> firmware mapper closure beégetett együtthatókkal.
+    
+    coeff: logikai tengelyenkénti (1/skála * előjel) szorzó
+    perm: firmware slotonként a logikai forrás index (3 = 0.0)
+    """
+    cx, cy, cz = coeff
+    ix, iy, iz = perm
+    
+    def mapper(x: float, y: float, z: float) -> Tuple[float, float, float]:
+        logical = (x * cx, y * cy, z * cz, 0.0)
+        return (logical[ix], logical[iy], logical[iz])
+    
+    return mapper
+
+
+def _make_incoming_mapper(perm: Tuple[int, int, int],
+                          coeff: Tuple[float, float, float]) -> AxisMapper:
+    """Firmware -> logikai mapper closure beégetett permutációval.
+    
+    perm: logikai slotonként a firmware forrás index (3 = 0.0)
+    coeff: logikai tengelyenkénti (skála * előjel) szorzó
+    """
+    ix, iy, iz = perm
+    cx, cy, cz = coeff
+    
+    def mapper(x: float, y: float, z: float) -> Tuple[float, float, float]:
+        firmware = (x, y, z, 0.0)
+        return (firmware[ix] * cx, firmware[iy] * cy, firmware[iz] * cz)
+    
+    return mapper
+
+
+def _identity_remap(gcode: str) -> str:
+    return gcode
+
+
+@functools.lru_cache(maxsize=8)
+def _make_gcode_remapper(targets: Tuple[str, str, str]) -> Callable[[str], str]:
+    """G-code tengely betű átíró a logikai X, Y, Z cél betűi szerint.
+    
+    Mapping-enként cache-elt: a set_axis_mapping oda-vissza váltásakor
+    ugyanazt a függvényt kapjuk vissza újraépítés nélkül.
+    """
+    if targets == ('X', 'Y', 'Z'):
+        return _identity_remap
+    # Kis- és nagybetűs forrás betű -> cél betű
+    letters = {}
+    for axis, target in zip('XYZ', targets):
+        letters[axis] = letters[axis.lower()] = target
+    
+    def remap_word(match: re.Match) -> str:
+        target = letters.get(match.group(1))
+        return target + match.group(2) if target else match.group(0)
+    
+    return functools.partial(RobotArmDevice._GCODE_WORD_RE.sub, remap_word)
+
+
 class RobotArmDevice(DeviceDriver):
     """
     3 tengelyes ipari robotkar driver (Red Sun Global / AXIS4UI kompatibilis).
@@ -61,8 +168,16 @@ class RobotArmDevice(DeviceDriver):
     # Válasz minták
     # Mozgás válasz: "INFO: LINEAR MOVE: X0.00 Y90.00 Z0.00 ."
     MOVE_RESPONSE_PATTERN = re.compile(
-        r"INFO:\s*LINEAR\s*MOVE:\s*X(-?\d+\.?\d*)\s*Y(-?\d+\.?\d*)\s*Z(-?\d+\.?\d*)"
+        r"INFO:\s*LINEAR\s*MOVE:\s*"
+        r"X([-+]?\d+(?:\.\d+)?)\s*Y([-+]?\d+(?:\.\d+)?)\s*Z([-+]?\d+(?:\.\d+)?)"
     )
+    # Olcsó előszűrő a regex előtt (a legtöbb válasz nem mozgás válasz)
+    MOVE_MARKER = "LINEAR MOVE"
+    # A tipikus (egysoros) mozgás válasz eleje - regex nélküli gyors út
+    MOVE_PREFIX = "INFO: LINEAR MOVE:"
+    # Ugyanezek bytes-ként a program streaming nyugtáihoz (nincs dekódolás)
+    _MOVE_PREFIX_B = b"INFO: LINEAR MOVE:"
+    _MOVE_MARKER_B = b"LINEAR MOVE"
     # Endstop válasz: "INFO: ENDSTOP: [X:0 Y:0 Z:0]"
     ENDSTOP_PATTERN = re.compile(
         r"INFO:\s*ENDSTOP:\s*\[X:(\d+)\s*Y:(\d+)\s*Z:(\d+)\]"
@@ -70,10 +185,90 @@ class RobotArmDevice(DeviceDriver):
     # Mód jelzések
     INFO_PATTERN = re.compile(r"^INFO:\s*(.+)$", re.IGNORECASE)
     ERROR_PATTERN = re.compile(r"^ERROR:\s*(.+)$", re.IGNORECASE)
+    # ERROR_PATTERN csak a válasz elején illeszkedhet - olcsó előszűrő
+    _ERROR_PREFIX = "ERROR:"
+    _ERROR_PREFIX_B = b"ERROR:"
+    # Válasz lezáró sor (INFO vagy ERROR) - közvetlenül a nyers RX pufferen
+    _MSG_PATTERN = re.compile(rb"^\s*(?:INFO|ERROR):", re.IGNORECASE | re.MULTILINE)
+    _NON_BLANK = re.compile(rb"\S")
+    # G-code szó (betű + szám, pl. "X50", "y-12.5", "X.5", "N10", "G1") -
+    # közös tokenizáló a tengely átíráshoz és a program clamphoz
+    _GCODE_WORD_RE = re.compile(r"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))", re.IGNORECASE)
+    # Nem mozgás, bár tengely szavai lehetnek: G4 (P), G10 (offset), G92 (pozíció beállítás)
+    _NON_MOTION_GCODES = frozenset((4.0, 10.0, 92.0))
+    # Zárójeles G-code komment (load_file)
+    _PAREN_COMMENT_RE = re.compile(r"\([^)]*\)")
+    
+    # Tengely betű -> slot index a permutációs táblákhoz
+    AXIS_IDX = {'X': 0, 'Y': 1, 'Z': 2}
+    
+    # Fix parancsok előre kódolva (nincs strip/encode küldésenként)
+    _CMD_ENABLE = b"M17\r\n"
+    _CMD_DISABLE = b"M84\r\n"
+    _CMD_ENDSTOPS = b"M119\r\n"
+    _CMD_ZERO = b"G92 X0 Y0 Z0\r\n"
+    _CMD_HOME = b"G1 X0 Y0 Z0 F50\r\n"
+    _CMD_GRIPPER_CLOSE = b"M3 S90\r\n"
+    _CMD_GRIPPER_OPEN = b"M3 S0\r\n"
+    _CMD_SUCKER_ON = b"M10\r\n"
+    _CMD_SUCKER_OFF = b"M11\r\n"
+    _CMD_WAIT_MOVES = b"M400\r\n"
+    # Teach lejátszás: fix várakozás pozíciók között (s) - M400 nélkül mindig,
+    # M400-zal csak végeffektor váltás után (szervó / vákuum beállása)
+    TEACH_SETTLE_TIME = 0.5
+    # Program streaming: a firmware soros bemeneti pufferének mérete (byte),
+    # ennyi nyugtázatlan byte lehet egyszerre úton (karakterszámlálás)
+    RX_BUFFER = 64
+    # Író szál: a sorban várakozó csomagokat egy write()-ba fűzzük, amíg
+    # az össz. méret el nem éri ezt a határt (byte)
+    WRITE_BATCH_MAX = 512
+    # Válasz nélküli parancsok (nincs INFO/ERROR nyugta) - a connect is
+    # válasz nélkül küldi a G92-t
+    _SILENT_CMDS = frozenset(("G90", "G91", "G92"))
+    # Biztosan nyugtázott parancsok (mozgás: INFO LINEAR MOVE a mozgás végén,
+    # végállás lekérdezés, M400: INFO vagy ERROR). A többit futáskor
+    # egyedül küldve próbáljuk ki (lásd _run_program).
+    _REPLY_CMDS = frozenset(("G0", "G1", "G00", "G01", "M119", "M400"))
+    # Program streaming: nyugtázott sor válaszára a timeout-on felül ennyit
+    # várunk (s) - a mozgás nyugtája csak a mozgás végén érkezik
+    PROGRAM_ACK_TIMEOUT = 60.0
+    
+    # Linux serial_struct ioctl-ok (low latency mód: USB-serial ~16 ms -> ~1 ms)
+    _TIOCGSERIAL = 0x541E
+    _TIOCSSERIAL = 0x541F
+    _ASYNC_LOW_LATENCY = 1 << 13
+    
+    # Mozgás parancs sablon (bytes %-formázás, nincs str -> bytes átkódolás)
+    _MOVE_FMT = b"G1 X%.2f Y%.2f Z%.2f F%d\r\n"
+    # Tanított pozíciók: előre formázott tengely rész + sebesség utótag
+    _MOVE_XYZ_FMT = b"G1 X%.2f Y%.2f Z%.2f"
+    _FEED_FMT = b"%b F%d\r\n"
     
     # Ismert INFO üzenetek
     WELCOME_MSG = "Connected, please calibrate the mechanical coordinates"
     
+    # Üzenet napló: gyűrűpuffer mérete és a kiürítés periódusa (max 10 Hz)
+    LOG_BUFFER_SIZE = 1000
+    LOG_FLUSH_INTERVAL = 0.1
+    
+    # Naplóüzenetek kötegelt callback-je: [(monotonic idő, üzenet), ...]
+    on_log: Optional[Callable[[List[Tuple[float, str]]], None]] = None
+    
+    # Program task leállításakor ennyit várunk a befejeződésére (s)
+    RUN_CANCEL_TIMEOUT = 1.0
+    
+    # Progress callback minimális időköze program futás közben (s)
+    PROGRESS_INTERVAL = 0.05
+    
+    # Port lista cache: (időbélyeg, portok) és élettartam (s) - a comports()
+    # Linuxon a /sys bejárása miatt lassú, a UI pedig gyakran lekérdezi
+    _ports_cache: Tuple[float, List[Dict[str, str]]] = (0.0, [])
+    PORTS_CACHE_TTL = 1.0
+    
+    # Közös állapot polling: egyetlen task szolgálja ki az összes példányt
+    _poll_registry: "weakref.WeakSet[RobotArmDevice]" = weakref.WeakSet()
+    _shared_poll_task: Optional[asyncio.Task] = None
+    
     def __init__(
         self,
         device_id: str,
@@ -95,23 +290,43 @@ class RobotArmDevice(DeviceDriver):
         self.baudrate = baudrate
         self.timeout = timeout
         
+        # Üzenet napló: print helyett gyűrűpuffer, kötegelt kiürítéssel
+        self._log_buffer: deque = deque(maxlen=self.LOG_BUFFER_SIZE)
+        self._log_flush_task: Optional[asyncio.Task] = None
+        
         # Tengely mapping: logikai (UI) -> fizikai (firmware)
         # Pl. {'X': 'Y', 'Y': 'X', 'Z': 'Z'} ha a firmware X motorja
         # fizikailag a Y ízülethez van kötve.
         # None vagy {} = identitás (nincs csere)
-        self._axis_map = axis_mapping or {'X': 'X', 'Y': 'Y', 'Z': 'Z'}
-        # Reverse map: firmware -> logikai (válasz feldolgozáshoz)
-        self._axis_map_reverse = {v: k for k, v in self._axis_map.items()}
+        self._build_axis_map(axis_mapping)
         
         # Tengely invertálás: melyik logikai tengely iránya fordított
         # Pl. {'Y': True} ha a Y tengely pozitív iránya a firmware-ben
         # ellentétes a kívánt UI irányhoz képest
         self._axis_invert = axis_invert or {}
+        self._inv_x = bool(self._axis_invert.get('X'))
+        self._inv_y = bool(self._axis_invert.get('Y'))
+        self._inv_z = bool(self._axis_invert.get('Z'))
         
         # Tengely skálázás: firmware egység -> fizikai fok konverziós faktor
         # Pl. {'X': 0.15} azt jelenti: 1 firmware egység = 0.15 fizikai fok
         # Ha nincs megadva: 1.0 (firmware egység = fok, nincs konverzió)
         self._axis_scale = axis_scale or {}
+        # Ugyanez logikai tengely sorrendben (X, Y, Z; 0 = nincs skálázás)
+        self._scale = tuple(self._axis_scale.get(axis, 0) for axis in 'XYZ')
+        
+        # Összevont (skála * irány) együtthatók logikai tengelyenként, így a
+        # mapping egyetlen szorzás + permutáció
+        # kimenő: fw = fok / scale * előjel, bejövő: fok = fw * scale * előjel
+        out_coeff = []
+        in_coeff = []
+        for scale, inverted in zip(self._scale, (self._inv_x, self._inv_y, self._inv_z)):
+            sign = -1.0 if inverted else 1.0
+            out_coeff.append((1.0 / scale if scale else 1.0) * sign)
+            in_coeff.append((scale if scale else 1.0) * sign)
+        self._out_coeff = tuple(out_coeff)
+        self._in_coeff = tuple(in_coeff)
+        self._build_mappers()
         
         # Szoftveres tengelylimitek (logikai tengelyekre, fokban)
         # Pl. {'X': [-180, 180], 'Y': [-90, 90], 'Z': [-120, 120]}
@@ -120,43 +335,87 @@ class RobotArmDevice(DeviceDriver):
             for axis, lim in axis_limits.items():
                 if isinstance(lim, (list, tuple)) and len(lim) == 2:
                     self._axis_limits[axis.upper()] = (float(lim[0]), float(lim[1]))
-            print(f"🤖 Tengelylimitek: {self._axis_limits}")
+            self._log(f"Tengelylimitek: {self._axis_limits}")
+        # Clamp határok lapos tuple-ben: (lo_x, hi_x, lo_y, hi_y, lo_z, hi_z),
+        # limit nélküli tengelyen ±inf
+        inf = float('inf')
+        self._lims = tuple(
+            bound
+            for axis in 'XYZ'
+            for bound in self._axis_limits.get(axis, (-inf, inf))
+        )
         
-        if axis_mapping and axis_mapping != {'X': 'X', 'Y': 'Y', 'Z': 'Z'}:
-            print(f"🤖 Tengely mapping: {self._axis_map}")
+        if not self._map_is_identity:
+            self._log(f"Tengely mapping: {self._axis_map}")
         if axis_invert:
             inverted = [k for k, v in axis_invert.items() if v]
             if inverted:
-                print(f"🤖 Invertált tengelyek: {', '.join(inverted)}")
+                self._log(f"Invertált tengelyek: {', '.join(inverted)}")
         if self._axis_scale:
-            print(f"🤖 Tengely skálák (fw->fok): {self._axis_scale}")
+            self._log(f"Tengely skálák (fw->fok): {self._axis_scale}")
         
         self._serial: Optional[serial.Serial] = None
         self._serial_lock = asyncio.Lock()
+        # Beérkező byte-ok puffere (félbemaradt sorok a következő olvasásig)
+        self._rx_buf = bytearray()
+        # Event-loop alapú olvasás (add_reader): fd + jelzés új adatra
+        self._reader_fd: Optional[int] = None
+        self._rx_event = asyncio.Event()
+        # Van-e fel nem dolgozott (kéretlen) adat az _rx_buf-ban
+        self._rx_dirty = False
+        # Dedikált író szál: a parancsok egy sorból kerülnek a portra,
+        # így nincs parancsonkénti thread pool oda-vissza út
+        self._write_q: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
         self._status_polling = False
-        self._poll_task: Optional[asyncio.Task] = None
+        self._poll_interval = 1.0
         self._run_task: Optional[asyncio.Task] = None
         self._diagnostics_running = False
         
-        # Endstop állapot: tengely -> blokkolt irány ('positive' vagy 'negative')
-        # Pl. {'Y': 'positive'} ha az Y tengely pozitív végállása aktív
-        self._endstop_blocked: Dict[str, str] = {}
+        # Endstop állapot: blokkolt irányok bitmaszkként (bit 0/1/2 = X/Y/Z)
+        # Pl. pos=0b010 ha az Y tengely pozitív végállása aktív
+        self._endstop_blocked_pos = 0
+        self._endstop_blocked_neg = 0
         
         # Robot állapot
         self._enabled = False
         self._calibrated = False
         self._gripper_state = "unknown"  # 'open' | 'closed' | 'unknown'
         self._sucker_state = False
+        # A firmware ténylegesen ebben az állapotban van-e (sikeres küldés
+        # után igaz) - csak ekkor hagyható ki az azonos állapotú parancs
+        self._gripper_confirmed = False
+        self._sucker_confirmed = False
         self._current_speed = 50  # Aktuális sebesség (1-100)
+        # M400 (mozgás befejezés megvárása) támogatás: None = még nem tudjuk
+        self._m400_supported: Optional[bool] = None
         
         # G-code fájl kezelés
         self._gcode_lines: List[str] = []
+        # Küldésre kész sorok tengely mapping-gel (load_file-kor számolva):
+        # (kódolt byte-ok sorvéggel, válasz nélküli-e; None = még nem tudjuk)
+        self._encoded_gcode_lines: List[Tuple[bytes, Optional[bool]]] = []
+        # Futás közben kipróbált parancsok: parancs szó -> válasz nélküli-e
+        self._silent_learned: Dict[bytes, bool] = {}
         self._current_line_index: int = 0
         self._running: bool = False
         self._paused: bool = False
+        # Pause jelzés a futtató loop-nak: set = fut, clear = szünetel
+        # (a loop await-tel alszik pause alatt, nincs periodikus ébredés)
+        self._pause_event = asyncio.Event()
+        self._pause_event.set()
+        # Utolsó on_job_progress hívás ideje, és van-e még ki nem küldött érték
+        self._last_progress_ts: float = 0.0
+        self._progress_pending: bool = False
         
         # Teaching mód - rögzített pozíciók
         self._taught_positions: List[Dict[str, Any]] = []
+        # A pozíciókhoz tartozó, már mappelt mozgás parancsok (F nélkül)
+        self._taught_gcode: List[bytes] = []
+        # Lekérdezéshez gyorsítótárazott, immutábilis nézet (verzió számlálóval)
+        self._taught_positions_version = 0
+        self._cached_positions: Tuple[Dict[str, Any], ...] = ()
+        self._cached_positions_ver = 0
         
         # Capabilities beállítása
         self._capabilities = DeviceCapabilities(
@@ -198,6 +457,8 @@ class RobotArmDevice(DeviceDriver):
                 )
             
             self._serial = await asyncio.to_thread(open_serial)
+            self._enable_low_latency()
+            self._start_writer()
             
             # Várakozás az inicializálásra
             await asyncio.sleep(2.5)
@@ -211,31 +472,38 @@ class RobotArmDevice(DeviceDriver):
                 welcome = welcome_bytes.decode(errors='replace').strip()
             
             if self.WELCOME_MSG in welcome:
-                print(f"🤖 Robotkar felismertve: {welcome}")
+                self._log(f"Robotkar felismertve: {welcome}")
                 self._calibrated = False
             else:
-                print(f"🤖 Robotkar válasz: {repr(welcome)}")
+                self._log(f"Robotkar válasz: {repr(welcome)}")
             
             self._connected = True
+            self._m400_supported = None
             self._set_state(DeviceState.IDLE)
             
+            # Beérkező adatok figyelése az event loop-ban (nincs polling)
+            self._start_reader()
+            
             # Pozíció szinkronizálás: G92-vel nullázzuk a firmware pozícióját
             # hogy megegyezzen a driver követett pozíciójával (0, 0, 0).
             # A firmware maga is kéri: "please calibrate the mechanical coordinates"
-            await self._send_command_no_response("G92 X0 Y0 Z0")
+            await self._send_bytes_no_response(self._CMD_ZERO)
             await asyncio.sleep(0.3)
             self._status.position = Position(x=0.0, y=0.0, z=0.0)
             self._status.work_position = Position(x=0.0, y=0.0, z=0.0)
             self._calibrated = True
             
-            # Állapot frissítése
+            # Állapot frissítése (csatlakozáskor a firmware újraindulhatott,
+            # a végeffektor parancsokat újra el kell küldeni)
+            self._gripper_confirmed = False
+            self._sucker_confirmed = False
             self._status.gripper_state = self._gripper_state
             self._status.sucker_state = self._sucker_state
             
             # Állapot polling indítása
             self._start_status_polling()
             
-            print(f"🤖 Robotkar csatlakozva: {self.device_name} ({self.port})")
+            self._log(f"Robotkar csatlakozva: {self.device_name} ({self.port})")
             return True
             
         except Exception as e:
@@ -246,6 +514,11 @@ class RobotArmDevice(DeviceDriver):
     async def disconnect(self) -> None:
         """Kapcsolat bontása"""
         self._stop_status_polling()
+        self._stop_reader()
+        self._stop_writer()
+        if self._log_flush_task:
+            self._log_flush_task.cancel()
+        self._flush_log()
         
         if self._serial and self._serial.is_open:
             try:
@@ -264,8 +537,10 @@ class RobotArmDevice(DeviceDriver):
         Hasznos USB disconnect/reconnect után, amikor a serial handle
         érvénytelenné válik de a port újra elérhető.
         """
-        print(f"🤖 Újracsatlakozás: {self.device_name} ({self.port})...")
+        self._log(f"Újracsatlakozás: {self.device_name} ({self.port})...")
         self._stop_status_polling()
+        self._stop_reader()
+        self._stop_writer()
         
         # Régi serial bezárása (hibaálló)
         if self._serial:
@@ -284,15 +559,54 @@ class RobotArmDevice(DeviceDriver):
     # TENGELY MAPPING
     # =========================================
     
+    def _build_axis_map(self, axis_mapping: Optional[dict]) -> None:
+        """Tengely mapping és az abból származtatott táblák beállítása"""
+        self._axis_map = axis_mapping or {'X': 'X', 'Y': 'Y', 'Z': 'Z'}
+        # Reverse map: firmware -> logikai (válasz feldolgozáshoz)
+        self._axis_map_reverse = {v: k for k, v in self._axis_map.items()}
+        # Identitás mapping esetén a G-code átírás kihagyható
+        self._map_is_identity = self._axis_map == {'X': 'X', 'Y': 'Y', 'Z': 'Z'}
+        # Előre számolt permutációs indexek (X=0, Y=1, Z=2; ismeretlen -> 3 = 0.0)
+        # _fw_from_log[i]: az i. firmware tengely értéke melyik logikai slotból jön
+        # _log_from_fw[i]: az i. logikai tengely értéke melyik firmware slotból jön
+        # _log_axis_of_fw[i]: az i. firmware tengely logikai betűje (endstop válasz)
+        axis_idx = self.AXIS_IDX
+        self._fw_from_log = tuple(
+            axis_idx.get(self._axis_map_reverse.get(a, a), 3) for a in 'XYZ'
+        )
+        self._log_from_fw = tuple(
+            axis_idx.get(self._axis_map.get(a, a), 3) for a in 'XYZ'
+        )
+        self._log_axis_of_fw = tuple(self._axis_map_reverse.get(a, a) for a in 'XYZ')
+        # G-code tengely betű csere: mapping-enként cache-elt regex sub
+        # (soronként nincs closure, mapping váltáskor nincs újraépítés)
+        self._remap_sub = _make_gcode_remapper(
+            tuple(self._axis_map.get(axis, axis) for axis in 'XYZ')
+        )
+    
+    def _build_mappers(self) -> None:
+        """Mapping closure-ök újraépítése (mapping / együttható változás után)"""
+        self._map_outgoing_fast = _make_outgoing_mapper(self._out_coeff, self._fw_from_log)
+        self._map_incoming_fast = _make_incoming_mapper(self._log_from_fw, self._in_coeff)
+    
+    def set_axis_mapping(self, axis_mapping: Optional[dict]) -> None:
+        """Tengely mapping módosítása futás közben.
+        
+        A betöltött program előre mappelt sorait is újraszámolja.
+        """
+        self._build_axis_map(axis_mapping)
+        self._build_mappers()
+        self._prepare_program()
+        self._taught_gcode = [self._position_move_bytes(pos) for pos in self._taught_positions]
+        self._log(f"Tengely mapping: {self._axis_map}")
+    
     def _apply_invert(self, x: float, y: float, z: float) -> tuple:
         """Invertálás alkalmazása a logikai tengelyekre (kimenő irány)."""
-        if self._axis_invert.get('X'):
-            x = -x
-        if self._axis_invert.get('Y'):
-            y = -y
-        if self._axis_invert.get('Z'):
-            z = -z
-        return (x, y, z)
+        return (
+            -x if self._inv_x else x,
+            -y if self._inv_y else y,
+            -z if self._inv_z else z,
+        )
     
     def _degrees_to_firmware(self, x: float, y: float, z: float) -> tuple:
         """Fizikai fokok -> firmware egységek (osztás a scale-lel).
@@ -300,9 +614,7 @@ class RobotArmDevice(DeviceDriver):
         Ha axis_scale nincs megadva (vagy 0), 1:1 konverzió (nincs skálázás).
         Pl. scale={'X': 0.15} → x_fw = x_deg / 0.15
         """
-        sx = self._axis_scale.get('X', 0)
-        sy = self._axis_scale.get('Y', 0)
-        sz = self._axis_scale.get('Z', 0)
+        sx, sy, sz = self._scale
         fw_x = x / sx if sx else x
         fw_y = y / sy if sy else y
         fw_z = z / sz if sz else z
@@ -314,9 +626,7 @@ class RobotArmDevice(DeviceDriver):
         Ha axis_scale nincs megadva (vagy 0), 1:1 konverzió (nincs skálázás).
         Pl. scale={'X': 0.15} → x_deg = x_fw * 0.15
         """
-        sx = self._axis_scale.get('X', 0)
-        sy = self._axis_scale.get('Y', 0)
-        sz = self._axis_scale.get('Z', 0)
+        sx, sy, sz = self._scale
         deg_x = x * sx if sx else x
         deg_y = y * sy if sy else y
         deg_z = z * sz if sz else z
@@ -330,16 +640,14 @@ class RobotArmDevice(DeviceDriver):
         2. Invertálás (axis_invert): logikai tengely irányának megfordítása
         3. Mapping (axis_mapping): logikai tengely -> firmware tengely
         """
-        # 1. Fizikai fok -> firmware egység
-        x, y, z = self._degrees_to_firmware(x, y, z)
-        # 2. Invertálás a logikai értékeken
-        x, y, z = self._apply_invert(x, y, z)
-        # 3. Mapping: logikai -> firmware
-        logical = {'X': x, 'Y': y, 'Z': z}
-        fw_x = logical.get(self._axis_map_reverse.get('X', 'X'), 0.0)
-        fw_y = logical.get(self._axis_map_reverse.get('Y', 'Y'), 0.0)
-        fw_z = logical.get(self._axis_map_reverse.get('Z', 'Z'), 0.0)
-        print(f"🔧 _map_outgoing: logical({x:.2f},{y:.2f},{z:.2f}) → fw({fw_x:.2f},{fw_y:.2f},{fw_z:.2f})")
+        # Skálázás + invertálás egy szorzással, majd permutáció - a
+        # _build_mappers által előre felépített closure-ben
+        fw_x, fw_y, fw_z = self._map_outgoing_fast(x, y, z)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "🔧 _map_outgoing: logical(%.2f,%.2f,%.2f) → fw(%.2f,%.2f,%.2f)",
+                x, y, z, fw_x, fw_y, fw_z,
+            )
         return (fw_x, fw_y, fw_z)
     
     def _map_incoming(self, fw_x: float, fw_y: float, fw_z: float) -> tuple:
@@ -350,16 +658,14 @@ class RobotArmDevice(DeviceDriver):
         2. Invertálás (axis_invert): logikai tengely irányának visszafordítása
         3. Skálázás (axis_scale): firmware egység -> fizikai fok
         """
-        # 1. Mapping: firmware -> logikai
-        firmware = {'X': fw_x, 'Y': fw_y, 'Z': fw_z}
-        log_x = firmware.get(self._axis_map.get('X', 'X'), 0.0)
-        log_y = firmware.get(self._axis_map.get('Y', 'Y'), 0.0)
-        log_z = firmware.get(self._axis_map.get('Z', 'Z'), 0.0)
-        # 2. Invertálás visszafordítása (szimmetrikus: -(-x) = x)
-        log_x, log_y, log_z = self._apply_invert(log_x, log_y, log_z)
-        # 3. Firmware egység -> fizikai fok
-        log_x, log_y, log_z = self._firmware_to_degrees(log_x, log_y, log_z)
-        print(f"🔧 _map_incoming: fw({fw_x:.2f},{fw_y:.2f},{fw_z:.2f}) → logical({log_x:.2f},{log_y:.2f},{log_z:.2f})")
+        # Permutáció, majd invertálás + skálázás egy szorzással - a
+        # _build_mappers által előre felépített closure-ben
+        log_x, log_y, log_z = self._map_incoming_fast(fw_x, fw_y, fw_z)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "🔧 _map_incoming: fw(%.2f,%.2f,%.2f) → logical(%.2f,%.2f,%.2f)",
+                fw_x, fw_y, fw_z, log_x, log_y, log_z,
+            )
         return (log_x, log_y, log_z)
     
     def _remap_gcode(self, gcode: str) -> str:
@@ -368,36 +674,13 @@ class RobotArmDevice(DeviceDriver):
         Pl. 'G1 X50 Y30 Z10 F50' -> 'G1 Y50 X30 Z10 F50' ha X<->Y swap.
         """
         # Identitás mapping esetén nincs mit csinálni
-        if self._axis_map == {'X': 'X', 'Y': 'Y', 'Z': 'Z'}:
+        if self._map_is_identity:
             return gcode
         
-        # Tengely értékek kinyerése
-        axis_values = {}
-        for axis in ['X', 'Y', 'Z']:
-            match = re.search(rf'([{axis}])(-?\d+\.?\d*)', gcode, re.IGNORECASE)
-            if match:
-                axis_values[axis.upper()] = match.group(2)
-        
-        if not axis_values:
-            return gcode
-        
-        # Mapping alkalmazás: a logikai tengely értékét a firmware tengelyre írjuk
-        # Placeholder-eket használunk, hogy elkerüljük az egymásra hatást
-        result = gcode
-        for logical_axis, value in axis_values.items():
-            firmware_axis = self._axis_map.get(logical_axis, logical_axis)
-            result = re.sub(
-                rf'{logical_axis}(-?\d+\.?\d*)',
-                f'__{firmware_axis}__{value}',
-                result,
-                flags=re.IGNORECASE
-            )
-        
-        # Placeholder-ek visszacserélése végleges formára
-        for axis in ['X', 'Y', 'Z']:
-            result = result.replace(f'__{axis}__', axis)
-        
-        return result
+        # Egyetlen menetben cseréljük a tengely tokeneket, így nincs
+        # szükség placeholder-ekre az egymásra hatás elkerüléséhez
+        # (a sub és a betű tábla a _build_axis_map-ben készül)
+        return self._remap_sub(gcode)
     
     # =========================================
     # SZOFTVERES TENGELYLIMITEK
@@ -406,64 +689,203 @@ class RobotArmDevice(DeviceDriver):
     def _clamp_to_limits(self, x: float, y: float, z: float) -> tuple:
         """Logikai pozíciók clampolása a konfigurált limitek közé.
         
+        Nem véges (NaN/inf) koordinátát nem clampolunk (a min/max NaN-t az
+        alsó limitre vinné), hanem ValueError-ral elutasítjuk.
+        
         Returns:
             (clamped_x, clamped_y, clamped_z, clamped_axes)
-            clamped_axes: dict {'X': True, 'Y': True, ...} ha clampolás történt
+            clamped_axes: bitmaszk (bit 0/1/2 = X/Y/Z), 0 ha nem volt clampolás
         """
-        clamped = {}
-        
-        if 'X' in self._axis_limits:
-            lo, hi = self._axis_limits['X']
-            if x < lo:
-                x = lo
-                clamped['X'] = True
-            elif x > hi:
-                x = hi
-                clamped['X'] = True
-        
-        if 'Y' in self._axis_limits:
-            lo, hi = self._axis_limits['Y']
-            if y < lo:
-                y = lo
-                clamped['Y'] = True
-            elif y > hi:
-                y = hi
-                clamped['Y'] = True
-        
-        if 'Z' in self._axis_limits:
-            lo, hi = self._axis_limits['Z']
-            if z < lo:
-                z = lo
-                clamped['Z'] = True
-            elif z > hi:
-                z = hi
-                clamped['Z'] = True
-        
-        return (x, y, z, clamped)
+        isfinite = math.isfinite
+        if not (isfinite(x) and isfinite(y) and isfinite(z)):
+            raise ValueError(f"Érvénytelen célpozíció: X={x} Y={y} Z={z}")
+        lo_x, hi_x, lo_y, hi_y, lo_z, hi_z = self._lims
+        cx = min(hi_x, max(lo_x, x))
+        cy = min(hi_y, max(lo_y, y))
+        cz = min(hi_z, max(lo_z, z))
+        clamped = (cx != x) | ((cy != y) << 1) | ((cz != z) << 2)
+        return (cx, cy, cz, clamped)
+    
+    @staticmethod
+    def _clamped_axes(mask: int) -> str:
+        """Clamp bitmaszk -> tengely betűk (log üzenetekhez)"""
+        return "".join(axis for i, axis in enumerate("XYZ") if mask >> i & 1)
     
     # =========================================
     # ALACSONY SZINTŰ KOMMUNIKÁCIÓ
     # =========================================
     
+    def _log(self, message: str) -> None:
+        """Üzenet a napló gyűrűpufferbe (nem blokkol, szálbiztos).
+        
+        A kiírás / on_log hívás kötegelve, max LOG_FLUSH_INTERVAL
+        gyakorisággal történik - a loop-ot nem fogja meg soronkénti stdout.
+        """
+        self._log_buffer.append((time.monotonic(), message))
+        if self._log_flush_task is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Nincs futó loop (__init__ / író szál) - a következő
+                # loop-ból jövő üzenet vagy a disconnect üríti
+                return
+            self._log_flush_task = loop.create_task(self._log_flush_loop())
+    
+    async def _log_flush_loop(self) -> None:
+        """Napló kiürítése periodikusan, amíg van új üzenet"""
+        try:
+            while True:
+                await asyncio.sleep(self.LOG_FLUSH_INTERVAL)
+                self._flush_log()
+                if not self._log_buffer:
+                    break
+        finally:
+            self._log_flush_task = None
+    
+    def _flush_log(self) -> None:
+        """Összegyűlt üzenetek átadása az on_log-nak, vagy egyetlen kiírás"""
+        if not self._log_buffer:
+            return
+        batch = []
+        pop = self._log_buffer.popleft
+        while self._log_buffer:
+            batch.append(pop())
+        if self.on_log:
+            try:
+                self.on_log(batch)
+            except Exception as e:
+                logger.warning(f"on_log callback hiba: {e}")
+        else:
+            print("\n".join(f"🤖 {msg}" for _, msg in batch), flush=True)
+    
+    def _enable_low_latency(self) -> None:
+        """ASYNC_LOW_LATENCY bekapcsolása a porton (Linux, TIOCSSERIAL).
+        
+        A USB-serial driverek (CH340, FTDI) alapból ~16 ms-ig gyűjtik a
+        beérkező byte-okat; low latency módban minden nyugta azonnal jön.
+        Nem Linux / nem támogatott eszköz esetén csendben kihagyjuk.
+        """
+        if not FCNTL_AVAILABLE or not self._serial:
+            return
+        try:
+            fd = self._serial.fileno()
+            # struct serial_struct: type, line, port, irq, flags, ... (int-ek)
+            buf = array.array('i', [0] * 32)
+            fcntl.ioctl(fd, self._TIOCGSERIAL, buf)
+            if buf[4] & self._ASYNC_LOW_LATENCY:
+                return
+            buf[4] |= self._ASYNC_LOW_LATENCY
+            fcntl.ioctl(fd, self._TIOCSSERIAL, buf)
+            self._log(f"Serial low latency mód bekapcsolva ({self.port})")
+        except (AttributeError, OSError, ValueError):
+            pass
+    
+    def _start_writer(self) -> None:
+        """Író szál indítása az aktuális serial porthoz"""
+        self._stop_writer()
+        self._write_q = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._writer_thread,
+            args=(self._serial, self._write_q),
+            name=f"{self.device_id}-writer",
+            daemon=True,
+        )
+        self._writer.start()
+    
+    def _stop_writer(self) -> None:
+        """Író szál leállítása (None jelzés a sor végén)"""
+        if self._write_q is not None:
+            self._write_q.put(None)
+        self._write_q = None
+        self._writer = None
+    
+    @classmethod
+    def _writer_thread(cls, ser, write_q: queue.Queue) -> None:
+        """Író szál: a sorból érkező (byte-ok, Future) csomagok kiírása a portra.
+        
+        Ha közben több csomag is sorba került, egyetlen write() hívással
+        írjuk ki őket (amíg el nem érjük a WRITE_BATCH_MAX-ot). Az írás
+        eredménye (vagy kivétele) a csomagok Future-jein jut vissza a hívóhoz.
+        """
+        while True:
+            item = write_q.get()
+            if item is None:
+                return
+            data, fut = item
+            futures = [fut]
+            stop = False
+            while len(data) < cls.WRITE_BATCH_MAX:
+                try:
+                    more = write_q.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    stop = True
+                    break
+                data += more[0]
+                futures.append(more[1])
+            try:
+                ser.write(data)
+                error = None
+            except Exception as e:
+                error = e
+            for fut in futures:
+                try:
+                    if error is None:
+                        fut.set_result(None)
+                    else:
+                        fut.set_exception(error)
+                except InvalidStateError:
+                    # A hívó közben megszakította a várakozást
+                    pass
+            if stop:
+                return
+    
     async def _write_bytes(self, data: bytes) -> None:
-        """Byte-ok írása a serial portra"""
+        """Byte-ok írása a serial portra (az író szálon keresztül).
+        
+        Megvárja a tényleges kiírást, így az írási hiba (pl. kihúzott port)
+        kivételként a hívóhoz jut.
+        """
         if not self._serial or not self._serial.is_open:
             return
-        await asyncio.to_thread(self._serial.write, data)
+        if self._write_q is not None:
+            fut = Future()
+            self._write_q.put_nowait((data, fut))
+            await asyncio.wrap_future(fut)
+        else:
+            await asyncio.to_thread(self._serial.write, data)
+    
+    async def _drain_input(self) -> None:
+        """Kéretlen beérkezett adatok eldobása egy parancs előtt.
+        
+        add_reader módban a kernel puffert a callback üríti, így elég az
+        _rx_buf-ot törölni - és csak akkor, ha érkezett bele valami.
+        """
+        if self._reader_fd is not None:
+            if self._rx_dirty:
+                self._rx_buf.clear()
+                self._rx_dirty = False
+            return
+        if self._serial.in_waiting:
+            await asyncio.to_thread(self._serial.read, self._serial.in_waiting)
+        self._rx_buf.clear()
     
     async def _send_command(self, command: str) -> str:
         """Parancs küldése és válasz olvasása (thread-safe)"""
+        return await self._send_bytes((command.strip() + "\r\n").encode())
+    
+    async def _send_bytes(self, data: bytes) -> str:
+        """Kész (sorvéggel lezárt) parancs byte-ok küldése és válasz olvasása"""
         if not self._serial or not self._serial.is_open:
             raise ConnectionError("Nincs kapcsolat")
         
         async with self._serial_lock:
             # Buffer ürítés a parancs előtt
-            if self._serial.in_waiting:
-                await asyncio.to_thread(self._serial.read, self._serial.in_waiting)
+            await self._drain_input()
             
             # Parancs küldése
-            cmd = command.strip() + "\r\n"
-            await asyncio.to_thread(self._serial.write, cmd.encode())
+            await self._write_bytes(data)
             
             # Válasz olvasása
             return await self._read_response_unlocked()
@@ -474,86 +896,241 @@ class RobotArmDevice(DeviceDriver):
         A firmware bizonyos parancsokra (mód váltás) nem küld választ.
         Ilyenkor felesleges a teljes timeout-ot kivárni.
         """
+        await self._send_bytes_no_response((command.strip() + "\r\n").encode())
+    
+    async def _send_bytes_no_response(self, data: bytes) -> None:
+        """Kész parancs byte-ok küldése válasz várása nélkül"""
         if not self._serial or not self._serial.is_open:
             return
         
         async with self._serial_lock:
             # Buffer ürítés
-            if self._serial.in_waiting:
-                await asyncio.to_thread(self._serial.read, self._serial.in_waiting)
+            await self._drain_input()
             
             # Parancs küldése
-            cmd = command.strip() + "\r\n"
-            await asyncio.to_thread(self._serial.write, cmd.encode())
+            await self._write_bytes(data)
             
-            # Rövid várakozás a feldolgozásra (nincs válasz, nem kell timeout-olni)
-            await asyncio.sleep(0.1)
+            # Minimális parancsköz a feldolgozásra (nincs válasz, nem kell
+            # timeout-olni); ha a firmware mégis válaszol, azonnal továbblépünk.
+            # Az esetleges válasz byte-okat a következő parancs eldobja.
+            self._rx_event.clear()
+            await self._wait_rx(0.02)
+    
+    def _start_reader(self) -> None:
+        """Serial fd regisztrálása az event loop-ban (loop.add_reader).
+        
+        Így csak akkor ébredünk, ha a kernel TTY pufferében tényleg van adat.
+        Ha a port nem ad fd-t (pl. Windows), marad az in_waiting polling.
+        """
+        self._stop_reader()
+        try:
+            fd = self._serial.fileno()
+            asyncio.get_running_loop().add_reader(fd, self._on_serial_readable, fd)
+        except (AttributeError, OSError, ValueError, NotImplementedError):
+            return
+        self._reader_fd = fd
+    
+    def _stop_reader(self) -> None:
+        """Serial fd leiratkoztatása az event loop-ból"""
+        if self._reader_fd is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self._reader_fd)
+        except (RuntimeError, OSError, ValueError):
+            pass
+        self._reader_fd = None
+        self._rx_event.set()
+    
+    def _on_serial_readable(self, fd: int) -> None:
+        """add_reader callback: a beérkezett byte-ok az _rx_buf-ba kerülnek"""
+        try:
+            data = os.read(fd, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            # EOF / hiba (pl. USB kihúzva) - nem figyeljük tovább az fd-t
+            self._stop_reader()
+            return
+        self._rx_buf += data
+        self._rx_dirty = True
+        self._rx_event.set()
+    
+    async def _wait_rx(self, timeout: float) -> bool:
+        """Várakozás új beérkező adatra legfeljebb timeout másodpercig.
+        
+        Returns:
+            True ha érkezett adat, False timeout esetén
+        """
+        if self._reader_fd is not None:
+            try:
+                await asyncio.wait_for(self._rx_event.wait(), timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+        
+        # Polling fallback (fd nélküli port)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not (self._serial and self._serial.in_waiting):
+            if loop.time() >= deadline:
+                return False
+            await asyncio.sleep(0.02)
+        return True
     
     async def _read_response_unlocked(self, timeout: float = None) -> str:
         """Válasz olvasása a soros portról"""
         if not self._serial:
             return ""
         
-        response_lines = []
-        start_time = asyncio.get_event_loop().time()
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
         timeout = timeout or self.timeout
+        # A teljes válasz az _rx_buf-ban gyűlik (nem dekódolunk soronként);
+        # scan: eddig a pozícióig vizsgáltuk már a teljes sorokat
+        rx_buf = self._rx_buf
+        scan = 0
+        have_lines = False
         
         while True:
-            in_waiting = await asyncio.to_thread(
-                lambda: self._serial.in_waiting if self._serial else 0
-            )
-            if in_waiting > 0:
-                try:
-                    line_bytes = await asyncio.to_thread(self._serial.readline)
-                    line = line_bytes.decode(errors='replace').strip()
-                    if line:
-                        response_lines.append(line)
-                        
-                        # A robot válaszai INFO: vagy ERROR: -rel kezdődnek
-                        # Egy INFO/ERROR sor a teljes válasz (nincs "ok" lezárás)
-                        if self.INFO_PATTERN.match(line) or self.ERROR_PATTERN.match(line):
-                            # Kis várakozás esetleges további sorokra
-                            await asyncio.sleep(0.05)
-                            continue
-                except Exception:
-                    pass
-            else:
-                # Ha van már válasz és nincs több adat, kész
-                if response_lines:
-                    await asyncio.sleep(0.1)
-                    in_waiting2 = await asyncio.to_thread(
-                        lambda: self._serial.in_waiting if self._serial else 0
-                    )
-                    if in_waiting2 == 0:
-                        break
-                await asyncio.sleep(0.02)
+            self._rx_event.clear()
+            
+            if self._reader_fd is None and self._serial:
+                # in_waiting egy nem blokkoló ioctl - nem kell thread pool
+                in_waiting = self._serial.in_waiting
+                if in_waiting > 0:
+                    try:
+                        # Egy olvasás a teljes beérkezett adatra (nem soronként)
+                        rx_buf += await asyncio.to_thread(self._serial.read, in_waiting)
+                    except Exception:
+                        pass
+            
+            got_msg = False
+            end = rx_buf.rfind(b"\n")
+            if end >= scan:
+                # Új teljes sorok: [scan, end) - félbemaradt sor a végén marad
+                if not have_lines:
+                    have_lines = self._NON_BLANK.search(rx_buf, scan, end) is not None
+                # A robot válaszai INFO: vagy ERROR: -rel kezdődnek
+                # Egy INFO/ERROR sor a teljes válasz (nincs "ok" lezárás)
+                got_msg = self._MSG_PATTERN.search(rx_buf, scan, end) is not None
+                scan = end + 1
             
             # Timeout
-            if asyncio.get_event_loop().time() - start_time > timeout:
+            remaining = timeout - (loop.time() - start_time)
+            if remaining <= 0:
                 break
+            
+            if have_lines:
+                # Ha van már válasz és rövid ideig nem jön több adat, kész
+                # (INFO/ERROR után kicsit tovább várunk esetleges további sorokra)
+                quiet = 0.15 if got_msg else 0.1
+                if not await self._wait_rx(min(quiet, remaining)):
+                    break
+            else:
+                await self._wait_rx(remaining)
         
-        result = "\n".join(response_lines)
+        # Egyetlen dekódolás a végén; a lezáratlan maradék is bekerül
+        # (readline timeout viselkedésének megfelelően)
+        text = rx_buf.decode(errors='replace')
+        rx_buf.clear()
+        self._rx_dirty = False
+        result = "\n".join(
+            line for line in (raw.strip() for raw in text.split("\n")) if line
+        )
         
         # Pozíció frissítése ha mozgás válasz érkezett
         self._parse_move_response(result)
         
         return result
     
-    def _parse_move_response(self, response: str) -> None:
-        """Mozgás válaszból pozíció kinyerése (firmware -> logikai tengely mapping-gel)"""
+    def _is_error_response(self, response: str) -> bool:
+        """ERROR válasz-e (a regex csak akkor fut, ha a prefix egyezik)"""
+        return (
+            response[:6].upper() == self._ERROR_PREFIX
+            and self.ERROR_PATTERN.search(response) is not None
+        )
+    
+    def _extract_move_position(self, response: str) -> Optional[tuple]:
+        """Firmware pozíció (X, Y, Z) kinyerése egy LINEAR MOVE válaszból.
+        
+        A fix formátumú "INFO: LINEAR MOVE: X.. Y.. Z.. ." választ
+        str.partition-nel bontjuk; minden más esetben a regex dönt.
+        """
+        if response.startswith(self.MOVE_PREFIX):
+            try:
+                _, _, rest = response.partition('X')
+                x_str, _, rest = rest.partition(' Y')
+                y_str, _, rest = rest.partition(' Z')
+                z_str = rest.split(None, 1)[0]
+                return (float(x_str), float(y_str), float(z_str))
+            except (ValueError, IndexError):
+                pass
         match = self.MOVE_RESPONSE_PATTERN.search(response)
         if match:
-            fw_x = float(match.group(1))
-            fw_y = float(match.group(2))
-            fw_z = float(match.group(3))
-            print(f"🔧 Firmware válasz pozíció: X={fw_x:.2f} Y={fw_y:.2f} Z={fw_z:.2f}")
-            # Firmware tengelyek -> logikai tengelyek (mapping + invert + scale)
-            log_x, log_y, log_z = self._map_incoming(fw_x, fw_y, fw_z)
-            self._status.position = Position(x=log_x, y=log_y, z=log_z)
-            self._status.work_position = Position(x=log_x, y=log_y, z=log_z)
-            print(f"🔧 Logikai pozíció frissítve: X={log_x:.2f} Y={log_y:.2f} Z={log_z:.2f}")
-            if self.on_position_update:
-                self.on_position_update(self._status.position)
+            return (float(match.group(1)), float(match.group(2)), float(match.group(3)))
+        return None
+    
+    def _parse_move_response(self, response: str) -> None:
+        """Mozgás válaszból pozíció kinyerése (firmware -> logikai tengely mapping-gel)
+
+        A marker keresése egyben a mozgás sor helyét is megadja: csak azt az
+        egy sort bontjuk (többsoros válasznál sem fut regex a teljes szövegen).
+        """
+        idx = response.find(self.MOVE_MARKER)
+        if idx < 0:
+            return
+        start = response.rfind("\n", 0, idx) + 1
+        end = response.find("\n", idx)
+        line = response[start:] if end < 0 else response[start:end]
+        fw_pos = self._extract_move_position(line)
+        if fw_pos:
+            self._update_position_from_fw(*fw_pos)
+    
+    def _parse_move_line(self, line: bytes) -> None:
+        """Nyers (bytes) nyugta sorból pozíció frissítés dekódolás nélkül.
+        
+        A fix formátumú mozgás választ bytes-on bontjuk (float() elfogad
+        bytes-ot); eltérő formátumnál a str alapú feldolgozásra esünk vissza.
+        """
+        if line.startswith(self._MOVE_PREFIX_B):
+            try:
+                _, _, rest = line.partition(b'X')
+                x_str, _, rest = rest.partition(b' Y')
+                y_str, _, rest = rest.partition(b' Z')
+                z_str = rest.split(None, 1)[0]
+                self._update_position_from_fw(float(x_str), float(y_str), float(z_str))
+                return
+            except (ValueError, IndexError):
+                pass
+        if self._MOVE_MARKER_B in line:
+            self._parse_move_response(line.decode(errors='replace'))
+    
+    def _update_position_from_fw(self, fw_x: float, fw_y: float, fw_z: float) -> None:
+        """Firmware pozíció -> logikai pozíció a státuszban (+ callback)"""
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("🔧 Firmware válasz pozíció: X=%.2f Y=%.2f Z=%.2f", fw_x, fw_y, fw_z)
+        # Firmware tengelyek -> logikai tengelyek (mapping + invert + scale)
+        log_x, log_y, log_z = self._map_incoming_fast(fw_x, fw_y, fw_z)
+        status = self._status
+        pos = status.position
+        if (
+            pos is status.work_position
+            and pos.x == log_x and pos.y == log_y and pos.z == log_z
+        ):
+            # Változatlan pozíció (pl. ismételt válasz): nincs új objektum,
+            # nincs callback
+            return
+        # Egy közös példány a gépi és munka pozícióhoz (ebben a driverben azonosak)
+        pos = Position(x=log_x, y=log_y, z=log_z)
+        status.position = pos
+        status.work_position = pos
+        if debug:
+            logger.debug("🔧 Logikai pozíció frissítve: X=%.2f Y=%.2f Z=%.2f", log_x, log_y, log_z)
+        if self.on_position_update:
+            self.on_position_update(pos)
     
     # =========================================
     # ÁLLAPOT LEKÉRDEZÉS
@@ -570,22 +1147,18 @@ class RobotArmDevice(DeviceDriver):
         interferálhat a mozgásparancsokkal.
         """
         try:
-            response = await self._send_command("M119")
+            response = await self._send_bytes(self._CMD_ENDSTOPS)
             match = self.ENDSTOP_PATTERN.search(response)
             if match:
-                # Firmware endstop értékek
-                fw_endstops = {
-                    'X': match.group(1) == '1',
-                    'Y': match.group(2) == '1',
-                    'Z': match.group(3) == '1',
-                }
-                # Firmware -> logikai tengely mapping alkalmazása
+                # Firmware endstop értékek (X, Y, Z sorrendben) ->
+                # logikai tengely mapping alkalmazása
                 # Ha axis_mapping: {'X': 'Y', 'Y': 'X', 'Z': 'Z'}, akkor:
                 #   firmware X endstop -> logikai Y (mert logikai Y = firmware X)
-                logical_endstops = {}
-                for fw_axis, triggered in fw_endstops.items():
-                    logical_axis = self._axis_map_reverse.get(fw_axis, fw_axis)
-                    logical_endstops[logical_axis] = triggered
+                # (_log_axis_of_fw: _build_axis_map-ben előre számolt betűk)
+                logical_endstops = dict(zip(
+                    self._log_axis_of_fw,
+                    (value == '1' for value in match.groups()),
+                ))
                 
                 # Statusba mentés
                 self._status.endstop_states = logical_endstops
@@ -594,7 +1167,7 @@ class RobotArmDevice(DeviceDriver):
             return {'X': False, 'Y': False, 'Z': False}
             
         except Exception as e:
-            print(f"🤖 Endstop lekérdezés hiba: {e}")
+            self._log(f"Endstop lekérdezés hiba: {e}")
             return {'X': False, 'Y': False, 'Z': False}
     
     async def _check_endstop_after_jog(self, axis: str, distance: float) -> None:
@@ -610,21 +1183,41 @@ class RobotArmDevice(DeviceDriver):
         try:
             endstops = await self.check_endstops()
             
+            bit = 1 << self.AXIS_IDX[axis]
+            pos = self._endstop_blocked_pos & ~bit
+            neg = self._endstop_blocked_neg & ~bit
             if endstops.get(axis, False):
                 # Végállás aktív: blokkoljuk a mozgás irányát
-                direction = 'positive' if distance > 0 else 'negative'
-                self._endstop_blocked[axis] = direction
-                print(f"🤖 Végállás aktív: {axis} {direction} irány blokkolva")
-            else:
-                # Végállás nem aktív: feloldjuk ha volt blokkolás
-                if axis in self._endstop_blocked:
-                    del self._endstop_blocked[axis]
+                if distance > 0:
+                    pos |= bit
+                    direction = 'positive'
+                else:
+                    neg |= bit
+                    direction = 'negative'
+                self._log(f"Végállás aktív: {axis} {direction} irány blokkolva")
+            # (Végállás nem aktív: a fenti maszkolás feloldja a blokkolást)
             
-            # Statusba írás (a frontend olvassa)
-            self._status.endstop_blocked = dict(self._endstop_blocked) if self._endstop_blocked else None
+            # Statusba írás (a frontend olvassa) - csak ha változott
+            if pos != self._endstop_blocked_pos or neg != self._endstop_blocked_neg:
+                self._endstop_blocked_pos = pos
+                self._endstop_blocked_neg = neg
+                self._status.endstop_blocked = self._endstop_blocked_view(pos, neg)
             
         except Exception as e:
-            print(f"🤖 Endstop ellenőrzés hiba jog után: {e}")
+            self._log(f"Endstop ellenőrzés hiba jog után: {e}")
+    
+    @staticmethod
+    def _endstop_blocked_view(pos: int, neg: int) -> Optional[Dict[str, str]]:
+        """Blokkolt irány bitmaszkok -> status dict ({'Y': 'positive'}), vagy None"""
+        if not (pos or neg):
+            return None
+        blocked = {}
+        for i, axis in enumerate("XYZ"):
+            if pos >> i & 1:
+                blocked[axis] = 'positive'
+            elif neg >> i & 1:
+                blocked[axis] = 'negative'
+        return blocked
     
     async def get_status(self) -> DeviceStatus:
         """Aktuális állapot lekérdezése.
@@ -648,26 +1241,42 @@ class RobotArmDevice(DeviceDriver):
     # =========================================
     
     def _start_status_polling(self, interval: float = 1.0) -> None:
-        """Állapot polling indítása (lassabb, mert nincs ? query)"""
+        """Állapot polling indítása (lassabb, mert nincs ? query).
+        
+        A példány a közös polling loop-ba regisztrál; a loop a regisztrált
+        példányok legkisebb intervallumával tick-el.
+        """
         if self._status_polling:
             return
         self._status_polling = True
-        self._poll_task = asyncio.create_task(self._poll_status(interval))
+        self._poll_interval = interval
+        cls = type(self)
+        cls._poll_registry.add(self)
+        task = cls._shared_poll_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            cls._shared_poll_task = asyncio.create_task(cls._shared_poll_loop())
     
     def _stop_status_polling(self) -> None:
         """Állapot polling leállítása"""
         self._status_polling = False
-        if self._poll_task:
-            self._poll_task.cancel()
-            self._poll_task = None
-    
-    async def _poll_status(self, interval: float) -> None:
-        """Állapot polling loop"""
-        while self._status_polling and self._connected:
-            try:
-                await self.get_status()
-            except Exception:
-                pass
+        cls = type(self)
+        cls._poll_registry.discard(self)
+        if not cls._poll_registry and cls._shared_poll_task:
+            cls._shared_poll_task.cancel()
+            cls._shared_poll_task = None
+    
+    @classmethod
+    async def _shared_poll_loop(cls) -> None:
+        """Közös állapot polling loop az összes regisztrált példányra"""
+        while cls._poll_registry:
+            devices = [d for d in cls._poll_registry if d._status_polling and d._connected]
+            if devices:
+                await asyncio.gather(
+                    *(d.get_status() for d in devices), return_exceptions=True
+                )
+                interval = min(d._poll_interval for d in devices)
+            else:
+                interval = 1.0
             await asyncio.sleep(interval)
     
     # =========================================
@@ -677,9 +1286,9 @@ class RobotArmDevice(DeviceDriver):
     async def enable(self) -> bool:
         """Robot motorok engedélyezése (M17)"""
         try:
-            await self._send_command("M17")
+            await self._send_bytes(self._CMD_ENABLE)
             self._enabled = True
-            print(f"🤖 Robot engedélyezve")
+            self._log(f"Robot engedélyezve")
             return True
         except Exception as e:
             self._set_error(f"Enable hiba: {str(e)}")
@@ -688,9 +1297,9 @@ class RobotArmDevice(DeviceDriver):
     async def disable(self) -> bool:
         """Robot motorok letiltása (M84)"""
         try:
-            await self._send_command("M84")
+            await self._send_bytes(self._CMD_DISABLE)
             self._enabled = False
-            print(f"🤖 Robot letiltva")
+            self._log(f"Robot letiltva")
             return True
         except Exception as e:
             self._set_error(f"Disable hiba: {str(e)}")
@@ -704,9 +1313,9 @@ class RobotArmDevice(DeviceDriver):
         """Alaphelyzetbe állítás - nullára mozgatás"""
         try:
             self._set_state(DeviceState.HOMING)
-            response = await self._send_command("G1 X0 Y0 Z0 F50")
+            response = await self._send_bytes(self._CMD_HOME)
             
-            if self.ERROR_PATTERN.search(response):
+            if self._is_error_response(response):
                 self._set_error(f"Homing hiba: {response}")
                 return False
             
@@ -764,19 +1373,19 @@ class RobotArmDevice(DeviceDriver):
                 target_x, target_y, target_z
             )
             if clamped:
-                print(f"🤖 Limit clamp: {clamped} "
+                self._log(f"Limit clamp: {self._clamped_axes(clamped)} "
                       f"(target: X={target_x:.1f} Y={target_y:.1f} Z={target_z:.1f})")
             
             # Logikai -> firmware tengely mapping
-            fw_x, fw_y, fw_z = self._map_outgoing(target_x, target_y, target_z)
+            fw_x, fw_y, fw_z = self._map_outgoing_fast(target_x, target_y, target_z)
             
             # Abszolút mozgás (G90 módban) - csak a kért tengely változik,
             # a többi a jelenlegi pozícióján marad -> firmware nem mozgatja
-            response = await self._send_command(
-                f"G1 X{fw_x:.2f} Y{fw_y:.2f} Z{fw_z:.2f} F{speed}"
+            response = await self._send_bytes(
+                _move_bytes(fw_x, fw_y, fw_z, speed)
             )
             
-            if self.ERROR_PATTERN.search(response):
+            if self._is_error_response(response):
                 return False
             
             # Végállás ellenőrzés a mozgás után
@@ -802,14 +1411,14 @@ class RobotArmDevice(DeviceDriver):
             # Szoftveres tengelylimitek alkalmazása (biztonsági háló)
             x, y, z, clamped = self._clamp_to_limits(x, y, z)
             if clamped:
-                print(f"🤖 Move limit clamp: {clamped} "
+                self._log(f"Move limit clamp: {self._clamped_axes(clamped)} "
                       f"(target: X={x:.1f} Y={y:.1f} Z={z:.1f})")
             
             # Logikai -> firmware tengely mapping
-            fw_x, fw_y, fw_z = self._map_outgoing(x, y, z)
-            response = await self._send_command(f"G1 X{fw_x:.2f} Y{fw_y:.2f} Z{fw_z:.2f} F{speed}")
+            fw_x, fw_y, fw_z = self._map_outgoing_fast(x, y, z)
+            response = await self._send_bytes(_move_bytes(fw_x, fw_y, fw_z, speed))
             
-            if self.ERROR_PATTERN.search(response):
+            if self._is_error_response(response):
                 return False
             
             return True
@@ -823,11 +1432,14 @@ class RobotArmDevice(DeviceDriver):
     
     async def gripper_on(self) -> bool:
         """Megfogó bezárása (szervó 90 fok)"""
+        if self._gripper_confirmed and self._gripper_state == "closed":
+            return True
         try:
-            await self._send_command("M3 S90")
+            await self._send_bytes(self._CMD_GRIPPER_CLOSE)
             self._gripper_state = "closed"
+            self._gripper_confirmed = True
             self._status.gripper_state = "closed"
-            print(f"🤖 Gripper: bezárva")
+            self._log(f"Gripper: bezárva")
             return True
         except Exception as e:
             self._set_error(f"Gripper hiba: {str(e)}")
@@ -835,11 +1447,14 @@ class RobotArmDevice(DeviceDriver):
     
     async def gripper_off(self) -> bool:
         """Megfogó nyitása (szervó 0 fok)"""
+        if self._gripper_confirmed and self._gripper_state == "open":
+            return True
         try:
-            await self._send_command("M3 S0")
+            await self._send_bytes(self._CMD_GRIPPER_OPEN)
             self._gripper_state = "open"
+            self._gripper_confirmed = True
             self._status.gripper_state = "open"
-            print(f"🤖 Gripper: nyitva")
+            self._log(f"Gripper: nyitva")
             return True
         except Exception as e:
             self._set_error(f"Gripper hiba: {str(e)}")
@@ -847,11 +1462,14 @@ class RobotArmDevice(DeviceDriver):
     
     async def sucker_on(self) -> bool:
         """Szívó bekapcsolása (M10)"""
+        if self._sucker_confirmed and self._sucker_state:
+            return True
         try:
-            await self._send_command("M10")
+            await self._send_bytes(self._CMD_SUCKER_ON)
             self._sucker_state = True
+            self._sucker_confirmed = True
             self._status.sucker_state = True
-            print(f"🤖 Szívó: bekapcsolva")
+            self._log(f"Szívó: bekapcsolva")
             return True
         except Exception as e:
             self._set_error(f"Szívó hiba: {str(e)}")
@@ -859,11 +1477,14 @@ class RobotArmDevice(DeviceDriver):
     
     async def sucker_off(self) -> bool:
         """Szívó kikapcsolása (M11)"""
+        if self._sucker_confirmed and not self._sucker_state:
+            return True
         try:
-            await self._send_command("M11")
+            await self._send_bytes(self._CMD_SUCKER_OFF)
             self._sucker_state = False
+            self._sucker_confirmed = True
             self._status.sucker_state = False
-            print(f"🤖 Szívó: kikapcsolva")
+            self._log(f"Szívó: kikapcsolva")
             return True
         except Exception as e:
             self._set_error(f"Szívó hiba: {str(e)}")
@@ -880,11 +1501,11 @@ class RobotArmDevice(DeviceDriver):
         """
         try:
             self._set_state(DeviceState.HOMING)
-            print(f"🤖 Kalibráció indítása...")
+            self._log(f"Kalibráció indítása...")
             
             # Nullázás: a robotot kézzel kell a home pozícióba állítani,
             # majd G92-vel resetelni a pozíciót
-            response = await self._send_command("G92 X0 Y0 Z0")
+            response = await self._send_bytes(self._CMD_ZERO)
             await asyncio.sleep(0.5)
             
             # Pozíció nullázás megerősítése
@@ -893,7 +1514,7 @@ class RobotArmDevice(DeviceDriver):
             self._calibrated = True
             
             self._set_state(DeviceState.IDLE)
-            print(f"🤖 Kalibráció kész")
+            self._log(f"Kalibráció kész")
             return True
                 
         except Exception as e:
@@ -912,7 +1533,7 @@ class RobotArmDevice(DeviceDriver):
             mapped_gcode = self._remap_gcode(gcode)
             response = await self._send_command(mapped_gcode)
             
-            if self.ERROR_PATTERN.search(response):
+            if self._is_error_response(response):
                 return f"error: {response}"
             
             return response
@@ -920,22 +1541,164 @@ class RobotArmDevice(DeviceDriver):
         except Exception as e:
             return f"error: {str(e)}"
     
+    @classmethod
+    def _parse_gcode_file(cls, filepath: str) -> List[str]:
+        """G-code fájl beolvasása, kommentek (; és zárójeles) eltávolítása"""
+        strip_parens = cls._PAREN_COMMENT_RE.sub
+        with open(filepath, "r") as f:
+            return [
+                line
+                for line in (strip_parens("", raw.split(";", 1)[0]).strip() for raw in f)
+                if line
+            ]
+    
+    def _clamp_program(self, lines: List[str]) -> int:
+        """Abszolút mozgás sorok tengely értékeinek clampolása a limitekre.
+        
+        A sorokat a _GCODE_WORD_RE-vel szavakra bontjuk, és követjük a modális
+        állapotot (G90/G91, G0/G1/G2/G3/G80) - így a G szó nélküli modális
+        mozgás ("X10 Y20"), a tömör ("G1X10"), a sorszámozott ("N10 G1 ...")
+        és a ".5" alakú értékek is clampolódnak. Relatív (G91) sorokat nem
+        clampolunk. Nem értelmezhető sort nem engedünk tovább: ValueError.
+        
+        A program értékei firmware egységben vannak (logikai tengely betűvel),
+        ezért a fokban megadott limiteket tengelyenként firmware egységre
+        váltjuk. Az összes érték egyetlen vektoros clip-pel megy (numpy, ha
+        elérhető), csak a ténylegesen clampolt sorokat írjuk újra (helyben).
+        
+        Returns:
+            A módosított sorok száma
+        """
+        # Limitek firmware egységben: fok = fw * _in_coeff
+        lo: List[float] = []
+        hi: List[float] = []
+        for i, coeff in enumerate(self._in_coeff):
+            a, b = self._lims[2 * i] / coeff, self._lims[2 * i + 1] / coeff
+            lo.append(min(a, b))
+            hi.append(max(a, b))
+        
+        # Abszolút mozgás sorok tengely értékei (hiányzó tengely: NaN)
+        axis_idx = self.AXIS_IDX
+        word_re = self._GCODE_WORD_RE
+        non_motion = self._NON_MOTION_GCODES
+        nan = float('nan')
+        rows: List[int] = []
+        values: List[List[float]] = []
+        tokens: List[List[re.Match]] = []
+        absolute = True
+        motion: Optional[float] = None  # modális mozgás mód (None = még nincs)
+        for index, line in enumerate(lines):
+            if word_re.sub("", line).strip():
+                raise ValueError(f"Nem értelmezhető G-code sor ({index + 1}): {line}")
+            
+            gcodes = set()
+            axes: List[re.Match] = []
+            for match in word_re.finditer(line):
+                letter = match.group(1).upper()
+                if letter == "G":
+                    gcodes.add(float(match.group(2)))
+                elif letter in axis_idx:
+                    axes.append(match)
+            
+            if 90.0 in gcodes:
+                absolute = True
+            elif 91.0 in gcodes:
+                absolute = False
+            for code in (0.0, 1.0, 2.0, 3.0, 80.0):
+                if code in gcodes:
+                    motion = code
+            
+            if not axes or not absolute or motion == 80.0 or gcodes & non_motion:
+                continue
+            row = [nan, nan, nan]
+            for match in axes:
+                row[axis_idx[match.group(1).upper()]] = float(match.group(2))
+            rows.append(index)
+            values.append(row)
+            tokens.append(axes)
+        if not rows or all(abs(bound) == float('inf') for bound in self._lims):
+            return 0
+        
+        if NUMPY_AVAILABLE:
+            orig = np.array(values, dtype=np.float64)
+            clipped = np.clip(orig, lo, hi)
+            # NaN != NaN, ezért a hiányzó tengelyeket kizárjuk
+            changed_mask = (clipped != orig) & ~np.isnan(orig)
+            changed = [
+                (i, clipped[i].tolist(), changed_mask[i].tolist())
+                for i in np.flatnonzero(changed_mask.any(axis=1))
+            ]
+        else:
+            changed = []
+            for i, row in enumerate(values):
+                new = [v if v != v else min(max(v, l), h) for v, l, h in zip(row, lo, hi)]
+                mask = [n != v and v == v for n, v in zip(new, row)]
+                if any(mask):
+                    changed.append((i, new, mask))
+        
+        for i, new, mask in changed:
+            index = rows[i]
+            line = lines[index]
+            # Hátulról írjuk át a szavakat, hogy a korábbi pozíciók érvényesek maradjanak
+            for match in reversed(tokens[i]):
+                axis = axis_idx[match.group(1).upper()]
+                if mask[axis]:
+                    line = f"{line[:match.start()]}{match.group(1)}{new[axis]:.2f}{line[match.end():]}"
+            lines[index] = line
+        return len(changed)
+    
+    def _prepare_program(self) -> None:
+        """Betöltött program előkészítése küldésre (lásd _encode_program)"""
+        self._encoded_gcode_lines = self._encode_program(self._gcode_lines)
+    
+    def _encode_program(self, lines: List[str]) -> List[Tuple[bytes, Optional[bool]]]:
+        """Program sorok küldésre kész formája.
+        
+        Tengely mapping, kódolás és a válasz nélküli sorok megjelölése
+        egyszer, előre - a futtató loop csak indexel és ír. Nem módosít
+        állapotot, így szálon is futtatható (load_file).
+        
+        A közvetlenül egymást követő, azonos abszolút mozgás sorokat (G90
+        módban ugyanarra a célra) üres, válasz nélküli bejegyzésként tároljuk:
+        nem kerülnek a vonalra, de a sor számozás és a progress változatlan.
+        """
+        remap = self._remap_gcode
+        encoded: List[Tuple[bytes, Optional[bool]]] = []
+        absolute = True
+        prev_move: Optional[str] = None
+        for line in lines:
+            line = remap(line)
+            key = line.strip().upper()
+            word = key.split(None, 1)[0] if key else ""
+            if word in ("G0", "G1", "G00", "G01"):
+                if absolute and key == prev_move:
+                    encoded.append((b"", True))
+                    continue
+                prev_move = key
+            else:
+                # Minden más parancs (G92, M..., módváltás) megszakítja a sorozatot
+                prev_move = None
+                if word == "G90":
+                    absolute = True
+                elif word == "G91":
+                    absolute = False
+            encoded.append(((line.strip() + "\r\n").encode(), self._is_silent_command(line)))
+        return encoded
+    
     async def load_file(self, filepath: str) -> bool:
         """G-code fájl betöltése"""
         try:
-            with open(filepath, "r") as f:
-                lines = f.readlines()
-            
-            self._gcode_lines = []
-            for line in lines:
-                line = line.strip()
-                # Komment eltávolítása
-                if ";" in line:
-                    line = line.split(";")[0].strip()
-                if "(" in line:
-                    line = re.sub(r"\([^)]*\)", "", line).strip()
-                if line:
-                    self._gcode_lines.append(line)
+            # Olvasás, feldolgozás, tengely mapping és kódolás egyszer,
+            # betöltéskor, szálon - nagy fájlnál se blokkolja a loop-ot
+            def load() -> Tuple[List[str], List[Tuple[bytes, Optional[bool]]], int]:
+                lines = self._parse_gcode_file(filepath)
+                # Szoftveres tengelylimitek a teljes programra, egyszer
+                clamped = self._clamp_program(lines)
+                return lines, self._encode_program(lines), clamped
+            
+            self._gcode_lines, self._encoded_gcode_lines, clamped = await asyncio.to_thread(load)
+            if clamped:
+                self._log(f"Program limit clamp: {clamped} sor a tengelylimitekre igazítva")
             
             self._current_line_index = 0
             self._status.current_file = filepath
@@ -943,7 +1706,7 @@ class RobotArmDevice(DeviceDriver):
             self._status.current_line = 0
             self._status.progress = 0.0
             
-            print(f"🤖 Program betöltve: {filepath} ({len(self._gcode_lines)} sor)")
+            self._log(f"Program betöltve: {filepath} ({len(self._gcode_lines)} sor)")
             return True
             
         except Exception as e:
@@ -956,101 +1719,292 @@ class RobotArmDevice(DeviceDriver):
             return False
         
         # Meglévő futás leállítása
-        if self._run_task and not self._run_task.done():
-            self._run_task.cancel()
-            try:
-                await self._run_task
-            except asyncio.CancelledError:
-                pass
+        await self._cancel_run_task()
         
         self._current_line_index = from_line
         self._running = True
         self._paused = False
+        self._pause_event.set()
         
-        self._run_task = asyncio.create_task(self._run_program())
+        self._run_task = asyncio.create_task(self._program_task())
         return True
     
+    async def _program_task(self) -> None:
+        """_run_program futtatása; leállításkor (cancel) is rendbe teszi az állapotot.
+        
+        Ha a megszakítás túllépte a RUN_CANCEL_TIMEOUT-ot és közben új program
+        indult, a régi task már nem nyúl az állapothoz.
+        """
+        try:
+            await self._run_program()
+        finally:
+            if self._run_task is asyncio.current_task():
+                self._running = False
+                self._flush_progress()
+                self._run_task = None
+    
+    async def _cancel_run_task(self) -> None:
+        """Futó program task megszakítása és a befejeződés megvárása.
+        
+        asyncio.wait nem dobja tovább a task CancelledError-ját, így a hívó
+        saját megszakítását sem nyeli el; timeout után sem vár tovább.
+        Az írás megszakítás közben sem szakad félbe: a kész csomagot az író
+        szál egyben adja át a portnak.
+        """
+        task = self._run_task
+        if task and not task.done():
+            task.cancel()
+            await asyncio.wait({task}, timeout=self.RUN_CANCEL_TIMEOUT)
+    
+    async def _read_ack_unlocked(self, timeout: float) -> Optional[bytes]:
+        """Egy nyugta (INFO/ERROR) sor olvasása az RX pufferből.
+        
+        Más sorokat (reset utáni üdvözlő szöveg, kéretlen üzenet) eldobunk -
+        ezek nem nyugtáznak programsort, a karakterszámlálást elrontanák.
+        A sor nyers bytes marad: a streaming loop csak hibánál dekódol.
+        
+        Returns:
+            A nyugta sor (strip-elve), vagy None timeout esetén
+        """
+        is_ack = self._MSG_PATTERN.match
+        rx_buf = self._rx_buf
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            self._rx_event.clear()
+            if self._reader_fd is None and self._serial:
+                in_waiting = self._serial.in_waiting
+                if in_waiting > 0:
+                    rx_buf += await asyncio.to_thread(self._serial.read, in_waiting)
+            
+            while True:
+                end = rx_buf.find(b"\n")
+                if end < 0:
+                    break
+                line = bytes(rx_buf[:end]).strip()
+                del rx_buf[:end + 1]
+                if not line:
+                    continue
+                if is_ack(line):
+                    return line
+                logger.debug("🤖 Nem nyugta sor eldobva: %r", line)
+            self._rx_dirty = bool(rx_buf)
+            
+            remaining = deadline - loop.time()
+            if remaining <= 0 or not await self._wait_rx(remaining):
+                return None
+    
+    def _is_silent_command(self, line: str) -> Optional[bool]:
+        """Olyan parancs-e, amire a firmware nem küld választ.
+        
+        Returns:
+            True: válasz nélküli (_SILENT_CMDS), False: nyugtázott
+            (_REPLY_CMDS), None: ismeretlen - futáskor derül ki
+        """
+        words = line.split(None, 1)
+        if not words:
+            return True
+        word = words[0].upper()
+        if word in self._SILENT_CMDS:
+            return True
+        if word in self._REPLY_CMDS:
+            return False
+        return None
+    
+    def _report_progress(self, done: int, total_lines: int) -> None:
+        """Progress frissítése és callback.
+        
+        A státusz minden sornál frissül, az on_job_progress viszont legfeljebb
+        PROGRESS_INTERVAL-onként (és mindig az utolsó sornál) hívódik.
+        """
+        self._current_line_index = done
+        self._status.current_line = done
+        if total_lines > 0:
+            self._status.progress = (done / total_lines) * 100
+        else:
+            self._status.progress = 100.0
+        
+        if self.on_job_progress:
+            now = time.monotonic()
+            if done < total_lines and now - self._last_progress_ts < self.PROGRESS_INTERVAL:
+                self._progress_pending = True
+                return
+            self._last_progress_ts = now
+            self._progress_pending = False
+            self.on_job_progress(self._status.progress, done, total_lines)
+    
+    def _flush_progress(self) -> None:
+        """Visszatartott utolsó progress érték kiküldése (futás vége)"""
+        if self._progress_pending and self.on_job_progress:
+            self._progress_pending = False
+            self._last_progress_ts = time.monotonic()
+            self.on_job_progress(
+                self._status.progress, self._status.current_line, len(self._gcode_lines)
+            )
+    
     async def _run_program(self) -> None:
-        """Program futtatás loop"""
+        """Program futtatás loop (streaming, karakterszámlálással).
+        
+        A sorokat egyetlen írásba csomagoljuk, amíg a nyugtázatlan byte-ok
+        száma belefér a firmware RX_BUFFER-ébe; minden INFO/ERROR nyugta
+        felszabadítja a hozzá tartozó sor (és az előtte küldött, válasz
+        nélküli sorok) helyét. Nincs fix várakozás a sorok között.
+        
+        Ismeretlen parancsot (_is_silent_command: None) egyedül küldünk, az
+        úton lévő sorok nyugtája után: ha timeout alatt nem jön válasz,
+        válasz nélkülinek tanuljuk és továbblépünk. Nyugtázott sorra
+        timeout + PROGRAM_ACK_TIMEOUT-ot várunk (a mozgás végéig), ennek
+        lejárta hibával leállítja a programot.
+        """
         self._set_state(DeviceState.RUNNING)
         total_lines = len(self._gcode_lines)
+        if len(self._encoded_gcode_lines) != total_lines:
+            # Kívülről beállított _gcode_lines: előkészítés most
+            self._prepare_program()
+        encoded_lines = self._encoded_gcode_lines
+        learned = self._silent_learned
+        ack_timeout = self.timeout + self.PROGRAM_ACK_TIMEOUT
+        next_index = self._current_line_index
+        # Úton lévő sorok: (sor index, byte hossz, válasz nélküli-e;
+        # None = próba sor, egyedül van úton)
+        in_flight: deque = deque()
+        in_flight_bytes = 0
         
-        while self._running and self._current_line_index < total_lines:
-            # Pause ellenőrzés
-            while self._paused:
-                await asyncio.sleep(0.1)
-                if not self._running:
-                    break
+        while self._running and (next_index < total_lines or in_flight):
+            # Pause: az úton lévő sorok nyugtáit még fogadjuk, újat nem küldünk
+            if self._paused and not in_flight:
+                await self._pause_event.wait()
+                continue
             
-            if not self._running:
+            if not self._serial or not self._serial.is_open:
+                self._set_error("G-code hiba: nincs kapcsolat")
+                self._running = False
                 break
             
-            # Következő sor küldése (tengely mapping alkalmazásával)
-            line = self._gcode_lines[self._current_line_index]
-            mapped_line = self._remap_gcode(line)
-            response = await self._send_command(mapped_line)
+            async with self._serial_lock:
+                if not in_flight:
+                    await self._drain_input()
+                
+                # Csomag összeállítása: amíg a firmware puffere engedi
+                batch = bytearray()
+                while (
+                    not self._paused
+                    and next_index < total_lines
+                ):
+                    data, silent = encoded_lines[next_index]
+                    if silent is None:
+                        silent = learned.get(data.split(None, 1)[0].upper())
+                    if silent is None and in_flight:
+                        # Próba sor: előbb az úton lévők nyugtái
+                        break
+                    if in_flight and in_flight_bytes + len(data) > self.RX_BUFFER:
+                        break
+                    batch += data
+                    in_flight.append((next_index, len(data), silent))
+                    in_flight_bytes += len(data)
+                    next_index += 1
+                    if silent is None:
+                        break
+                if batch:
+                    await self._write_bytes(bytes(batch))
+                
+                # Csak válasz nélküli sorok vannak úton: nincs mire várni
+                if all(silent for _, _, silent in in_flight):
+                    if in_flight:
+                        in_flight_bytes = 0
+                        done = in_flight[-1][0] + 1
+                        in_flight.clear()
+                        self._report_progress(done, total_lines)
+                    continue
+                
+                # Egy nyugta fogadása
+                probe = in_flight[0][2] is None
+                response = await self._read_ack_unlocked(
+                    self.timeout if probe else ack_timeout
+                )
             
-            # Hiba ellenőrzés
-            if self.ERROR_PATTERN.search(response):
-                error_msg = response.strip()
+            if probe:
+                # Próba sor: a válasz (vagy hiánya) dönti el a parancs fajtáját
+                index, size, _ = in_flight.popleft()
+                in_flight_bytes -= size
+                word = encoded_lines[index][0].split(None, 1)[0].upper()
+                learned[word] = response is None
+                if response is None:
+                    logger.debug("🤖 Válasz nélküli parancs: %s", word.decode(errors='replace'))
+                    self._report_progress(index + 1, total_lines)
+                    continue
+            elif response is None:
+                # Nyugta nélkül nem tudjuk, mennyi fért a firmware pufferébe
+                index = next(i for i, _, silent in in_flight if not silent)
+                self._set_error(
+                    f"G-code hiba (sor {index + 1}): nincs nyugta {ack_timeout:.1f} s alatt"
+                )
+                self._running = False
+                self._current_line_index = in_flight[0][0]
+                break
+            else:
+                # Az első nyugtát váró sorig a válasz nélküliek is kész vannak
+                while in_flight:
+                    index, size, silent = in_flight.popleft()
+                    in_flight_bytes -= size
+                    if not silent:
+                        break
+            
+            # Hiba ellenőrzés - csak ERROR nyugtát dekódolunk
+            if response[:6].upper() == self._ERROR_PREFIX_B:
+                text = response.decode(errors='replace')
                 # Ismeretlen parancsot átugorjuk (komment, nem támogatott)
-                if "COMMAND NOT RECOGNIZED" in response:
-                    print(f"🤖 Átugorva (sor {self._current_line_index + 1}): {line}")
-                else:
-                    self._set_error(
-                        f"G-code hiba (sor {self._current_line_index + 1}): {error_msg}"
-                    )
+                if "COMMAND NOT RECOGNIZED" in text:
+                    self._log(f"Átugorva (sor {index + 1}): {self._gcode_lines[index]}")
+                elif self._is_error_response(text):
+                    self._set_error(f"G-code hiba (sor {index + 1}): {text}")
                     self._running = False
+                    self._current_line_index = index
                     break
-            
-            # Kis várakozás a mozgás befejezésére
-            await asyncio.sleep(0.1)
-            
-            # Progress frissítése
-            self._current_line_index += 1
-            self._status.current_line = self._current_line_index
-            if total_lines > 0:
-                self._status.progress = (self._current_line_index / total_lines) * 100
             else:
-                self._status.progress = 100.0
+                self._parse_move_line(response)
             
-            if self.on_job_progress:
-                self.on_job_progress(
-                    self._status.progress,
-                    self._current_line_index,
-                    total_lines,
-                )
+            # Progress frissítése
+            self._report_progress(index + 1, total_lines)
         
         # Befejezés
+        self._flush_progress()
         if self._current_line_index >= total_lines:
             self._status.progress = 100.0
             if self.on_job_complete:
                 self.on_job_complete(self._status.current_file or "")
         
         self._running = False
-        self._run_task = None
         self._set_state(DeviceState.IDLE)
     
     async def pause(self) -> bool:
         """Program megállítása"""
         self._paused = True
+        self._pause_event.clear()
         self._set_state(DeviceState.PAUSED)
         return True
     
     async def resume(self) -> bool:
         """Program folytatása"""
         self._paused = False
+        self._pause_event.set()
         self._set_state(DeviceState.RUNNING)
         return True
     
     async def stop(self) -> bool:
-        """Program és mozgás leállítása"""
+        """Program leállítása.
+        
+        Új sort nem küldünk, de a streaming miatt már kiküldött (legfeljebb
+        RX_BUFFER byte-nyi) mozgásokat a firmware még végrehajtja - a stop
+        ezeket nem üríti ki a firmware pufferéből.
+        """
         try:
             self._running = False
             self._paused = False
+            # Szüneteltetett loop felébresztése, hogy lássa a leállítást
+            self._pause_event.set()
             
-            if self._run_task and not self._run_task.done():
-                self._run_task.cancel()
+            await self._cancel_run_task()
             
             self._set_state(DeviceState.IDLE)
             return True
@@ -1082,10 +2036,49 @@ class RobotArmDevice(DeviceDriver):
             "sucker": self._sucker_state,
         }
         self._taught_positions.append(pos)
-        print(f"🤖 Pozíció rögzítve #{pos['index']}: "
+        self._taught_gcode.append(self._position_move_bytes(pos))
+        self._taught_positions_version += 1
+        self._log(f"Pozíció rögzítve #{pos['index']}: "
               f"X={pos['x']:.2f} Y={pos['y']:.2f} Z={pos['z']:.2f}")
         return pos
     
+    def _position_move_bytes(self, pos: Dict[str, Any]) -> bytes:
+        """Tanított pozíció -> clampolt, mappelt mozgás parancs (F nélkül)"""
+        x, y, z, _ = self._clamp_to_limits(pos['x'], pos['y'], pos['z'])
+        return self._MOVE_XYZ_FMT % self._map_outgoing_fast(x, y, z)
+    
+    async def _move_to_precomputed(self, move_xyz: bytes, speed: float) -> bool:
+        """Előre formázott mozgás parancs küldése a megadott sebességgel"""
+        try:
+            speed = max(1, min(100, int(speed)))
+            response = await self._send_bytes(self._FEED_FMT % (move_xyz, speed))
+            return not self._is_error_response(response)
+        except Exception as e:
+            self._set_error(f"Move hiba: {str(e)}")
+            return False
+    
+    async def _wait_motion_complete(self) -> bool:
+        """Várakozás a mozgás befejezésére M400-zal.
+        
+        Az első hívás kideríti, hogy a firmware ismeri-e az M400-at
+        (ERROR vagy néma timeout = nem); az eredményt megjegyezzük.
+        
+        Returns:
+            True ha az M400 nyugtázta a mozgás végét, False ha nem támogatott
+        """
+        if self._m400_supported is False:
+            return False
+        try:
+            response = await self._send_bytes(self._CMD_WAIT_MOVES)
+        except Exception:
+            return False
+        supported = bool(response) and not self._is_error_response(response)
+        if self._m400_supported is None:
+            self._m400_supported = supported
+            if not supported:
+                self._log("M400 nem támogatott - fix várakozás a pozíciók között")
+        return supported
+    
     async def teach_play(self, speed: float = 50.0) -> bool:
         """Rögzített pozíciók lejátszása"""
         if not self._taught_positions:
@@ -1094,13 +2087,14 @@ class RobotArmDevice(DeviceDriver):
         self._set_state(DeviceState.RUNNING)
         self._running = True
         
-        for pos in self._taught_positions:
+        for pos, move_xyz in zip(self._taught_positions, self._taught_gcode):
             if not self._running:
                 break
             
-            # Pozícióra mozgás
-            await self.move_to(pos['x'], pos['y'], pos['z'], speed)
+            # Pozícióra mozgás (rögzítéskor előre formázott paranccsal)
+            await self._move_to_precomputed(move_xyz, speed)
             
+            effector = (self._gripper_state, self._sucker_state)
             # Végeffektor állapot beállítása
             if pos.get("gripper") == "closed":
                 await self.gripper_on()
@@ -1112,7 +2106,13 @@ class RobotArmDevice(DeviceDriver):
             elif pos.get("sucker") is False:
                 await self.sucker_off()
             
-            await asyncio.sleep(0.5)  # Rövid várakozás pozíciók között
+            # Várakozás a mozgás végére: M400 nyugta, ha a firmware ismeri,
+            # különben rövid fix várakozás pozíciók között. Az M400 csak a
+            # mozgást várja meg - végeffektor váltás után a megfogó / szívó
+            # beállására továbbra is várunk.
+            motion_done = await self._wait_motion_complete()
+            if not motion_done or effector != (self._gripper_state, self._sucker_state):
+                await asyncio.sleep(self.TEACH_SETTLE_TIME)
         
         self._running = False
         self._set_state(DeviceState.IDLE)
@@ -1121,22 +2121,36 @@ class RobotArmDevice(DeviceDriver):
     def teach_clear(self) -> None:
         """Rögzített pozíciók törlése"""
         self._taught_positions.clear()
-        print(f"🤖 Tanított pozíciók törölve")
+        self._taught_gcode.clear()
+        self._taught_positions_version += 1
+        self._log(f"Tanított pozíciók törölve")
     
-    def teach_get_positions(self) -> List[Dict[str, Any]]:
-        """Rögzített pozíciók lekérdezése"""
-        return self._taught_positions.copy()
+    def teach_get_positions(self) -> Tuple[Dict[str, Any], ...]:
+        """Rögzített pozíciók lekérdezése.
+        
+        Immutábilis tuple-t ad vissza, amit csak módosítás után építünk újra
+        (UI polling esetén nincs listamásolás lekérdezésenként).
+        """
+        if self._cached_positions_ver != self._taught_positions_version:
+            self._cached_positions = tuple(self._taught_positions)
+            self._cached_positions_ver = self._taught_positions_version
+        return self._cached_positions
     
     # =========================================
     # SEGÉD FUNKCIÓK
     # =========================================
     
-    @staticmethod
-    def list_ports() -> List[Dict[str, str]]:
-        """Elérhető soros portok listázása"""
+    @classmethod
+    def list_ports(cls) -> List[Dict[str, str]]:
+        """Elérhető soros portok listázása (PORTS_CACHE_TTL ideig cache-elve)"""
         if not SERIAL_AVAILABLE:
             return []
         
+        now = time.monotonic()
+        ts, cached = cls._ports_cache
+        if ts and now - ts < cls.PORTS_CACHE_TTL:
+            return list(cached)
+        
         ports = []
         for port in serial.tools.list_ports.comports():
             ports.append({
@@ -1144,7 +2158,8 @@ class RobotArmDevice(DeviceDriver):
                 "description": port.description,
                 "hwid": port.hwid,
             })
-        return ports
+        RobotArmDevice._ports_cache = (now, ports)
+        return list(ports)
     
     def get_info(self) -> Dict[str, Any]:
         """Eszköz információk lekérdezése (bővített)"""
@@ -7,7 +7,11 @@ funkcionalitását tartalmazza (serial nyitás/zárás, írás, olvasás).
 """
 
 import asyncio
-from typing import Optional
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 from abc import abstractmethod
 
 try:
@@ -50,6 +54,13 @@ class SerialDeviceBase(JogSafeDeviceDriver):
         protokoll-specifikus metódusokat (pl. GRBL, LinuxCNC).
     """
     
+    # Válasz olvasásnál ennyi csend után tekintjük lezártnak a választ (s)
+    RESPONSE_QUIET_TIME = 0.05
+    
+    # Válasz nélküli parancs után ennyit tartjuk a lockot (s), hogy egy
+    # esetleges késő nyugta ne a következő parancs válaszaként jelenjen meg
+    NO_RESPONSE_SETTLE = 0.1
+    
     def __init__(
         self,
         device_id: str,
@@ -70,6 +81,9 @@ class SerialDeviceBase(JogSafeDeviceDriver):
         
         self._serial: Optional[serial.Serial] = None
         self._serial_lock = asyncio.Lock()
+        # Dedikált író szál: minden írás ugyanazon a szálon, sorrendben
+        # megy ki, és nem áll be a hosszan blokkoló olvasások mögé
+        self._write_executor: Optional[ThreadPoolExecutor] = None
     
     # =========================================
     # SERIAL PORT KEZELÉS
@@ -97,6 +111,11 @@ class SerialDeviceBase(JogSafeDeviceDriver):
             await asyncio.to_thread(self._serial.reset_input_buffer)
             await asyncio.to_thread(self._serial.reset_output_buffer)
             
+            if self._write_executor is None:
+                self._write_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f"serial-{self.device_id}"
+                )
+            
             return True
             
         except Exception as e:
@@ -111,6 +130,9 @@ class SerialDeviceBase(JogSafeDeviceDriver):
             except Exception:
                 pass
         self._serial = None
+        if self._write_executor is not None:
+            self._write_executor.shutdown(wait=False)
+            self._write_executor = None
     
     @property
     def is_serial_open(self) -> bool:
@@ -130,7 +152,35 @@ class SerialDeviceBase(JogSafeDeviceDriver):
         """
         if not self.is_serial_open:
             return
-        await asyncio.to_thread(self._serial.write, data)
+        await self._run_serial_io(self._serial.write, data)
+    
+    async def _drain_and_write(self, data: bytes) -> None:
+        """
+        Input buffer ürítése és írás egyetlen szálváltással (lock nélkül -
+        a hívónak kell lockolnia).
+        
+        Args:
+            data: Küldendő byte-ok
+        """
+        if not self.is_serial_open:
+            return
+        await self._run_serial_io(self._drain_and_write_blocking, self._serial, data)
+    
+    @staticmethod
+    def _drain_and_write_blocking(ser, data: bytes) -> None:
+        """Beérkezett (eldobandó) bájtok kiolvasása, majd írás (I/O szálon fut)"""
+        waiting = ser.in_waiting
+        if waiting:
+            ser.read(waiting)
+        ser.write(data)
+    
+    async def _run_serial_io(self, func: Callable, *args):
+        """Blokkoló serial I/O futtatása az eszköz író szálán (ha van)"""
+        if self._write_executor is None:
+            return await asyncio.to_thread(func, *args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._write_executor, func, *args
+        )
     
     async def _flush_input_buffer(self) -> None:
         """Input buffer ürítése."""
@@ -157,12 +207,9 @@ class SerialDeviceBase(JogSafeDeviceDriver):
             raise ConnectionError("Nincs kapcsolat")
         
         async with self._serial_lock:
-            # Buffer ürítés a parancs előtt
-            await self._flush_input_buffer_unlocked()
-            
-            # Parancs küldése
+            # Buffer ürítés a parancs előtt + parancs küldése
             cmd = command.strip() + "\n"
-            await asyncio.to_thread(self._serial.write, cmd.encode())
+            await self._drain_and_write(cmd.encode())
             
             # Válasz olvasása
             return await self._read_response_unlocked(timeout=timeout)
@@ -181,17 +228,21 @@ class SerialDeviceBase(JogSafeDeviceDriver):
             return
         
         async with self._serial_lock:
-            await self._flush_input_buffer_unlocked()
             cmd = command.strip() + "\n"
-            await asyncio.to_thread(self._serial.write, cmd.encode())
-            await asyncio.sleep(0.1)
+            await self._drain_and_write(cmd.encode())
+            if self.NO_RESPONSE_SETTLE > 0:
+                await asyncio.sleep(self.NO_RESPONSE_SETTLE)
     
     async def _flush_input_buffer_unlocked(self) -> None:
         """Input buffer ürítése (lock nélkül - a hívónak kell lockolnia)."""
         if self._serial and self._serial.in_waiting:
             await asyncio.to_thread(self._serial.read, self._serial.in_waiting)
     
-    async def _read_response_unlocked(self, timeout: float = None) -> str:
+    async def _read_response_unlocked(
+        self,
+        timeout: float = None,
+        terminator: Optional[Callable[[str], bool]] = None,
+    ) -> str:
         """
         Válasz olvasása a soros portról (lock nélkül).
         
@@ -202,6 +253,8 @@ class SerialDeviceBase(JogSafeDeviceDriver):
         
         Args:
             timeout: Timeout másodpercben (default: self.timeout)
+            terminator: Válasz-lezáró sor felismerő
+                (default: self._is_response_terminator)
             
         Returns:
             Válasz sorok összefűzve newline-nal
@@ -209,43 +262,188 @@ class SerialDeviceBase(JogSafeDeviceDriver):
         if not self._serial:
             return ""
         
-        response_lines = []
-        start_time = asyncio.get_event_loop().time()
         timeout = timeout or self.timeout
+        terminator = terminator or self._is_response_terminator
+        
+        # Ha a port ad fd-t (POSIX), az event loop ébreszt beérkező adatra -
+        # nincs szálváltás az olvasáshoz
+        response = await self._read_response_evented(timeout, terminator)
+        if response is not None:
+            return response.decode(errors='replace')
         
-        while True:
-            in_waiting = await asyncio.to_thread(
-                lambda: self._serial.in_waiting if self._serial else 0
+        # A teljes olvasó ciklus egyetlen szálváltással fut (nem minden
+        # in_waiting / readline hívás külön to_thread); megszakításkor a
+        # szál a következő körben kilép, így nem nyeli el a következő
+        # parancs válaszát
+        cancelled = threading.Event()
+        try:
+            response = await asyncio.to_thread(
+                self._read_response_blocking,
+                self._serial,
+                timeout,
+                cancelled,
+                terminator,
             )
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        
+        return response.decode(errors='replace')
+    
+    async def _read_response_evented(
+        self,
+        timeout: float,
+        terminator: Callable[[str], bool],
+    ) -> Optional[bytearray]:
+        """
+        Válasz sorok olvasása loop.add_reader-rel (szál nélkül).
+        
+        Az fd csak az olvasás idejére van regisztrálva, így a parancsok
+        közötti közvetlen serial hozzáférést (pl. diagnosztika) nem zavarja.
+        Ugyanaz a lezárási logika, mint a _read_response_blocking-nál.
+        
+        Returns:
+            A válasz bájtjai, vagy None ha a port nem támogatja
+            (nincs fd / a loop nem tud add_reader-t) - ekkor a hívó a
+            szálas olvasásra esik vissza
+        """
+        try:
+            fd = self._serial.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+        
+        loop = asyncio.get_running_loop()
+        rx = bytearray()
+        data_ready = asyncio.Event()
+        eof = False
+        
+        def on_readable() -> None:
+            nonlocal eof
+            try:
+                data = os.read(fd, 4096)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                data = b""
+            if not data:
+                # EOF / hiba (pl. USB kihúzva) - nem figyeljük tovább
+                eof = True
+                loop.remove_reader(fd)
+            rx.extend(data)
+            data_ready.set()
+        
+        try:
+            loop.add_reader(fd, on_readable)
+        except (NotImplementedError, OSError, ValueError):
+            return None
+        
+        response = bytearray()
+        deadline = loop.time() + timeout
+        pos = 0
+        try:
+            while True:
+                # Teljes sorok feldolgozása [pos, newline)
+                terminated = False
+                nl = rx.find(b"\n", pos)
+                while nl >= 0:
+                    raw = rx[pos:nl].strip()
+                    pos = nl + 1
+                    if raw:
+                        if response:
+                            response += b"\n"
+                        response += raw
+                        if terminator(raw.decode(errors='replace')):
+                            terminated = True
+                            break
+                    nl = rx.find(b"\n", pos)
+                if terminated:
+                    return response
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0 or eof:
+                    break
+                data_ready.clear()
+                wait = min(self.RESPONSE_QUIET_TIME, remaining) if response else remaining
+                try:
+                    await asyncio.wait_for(data_ready.wait(), wait)
+                except asyncio.TimeoutError:
+                    if response:
+                        # Van már válasz és nem jön több adat - kész
+                        break
+        finally:
+            if not eof:
+                loop.remove_reader(fd)
+        
+        # Lezáratlan maradék sor (timeout / csend esetén) is a válasz része
+        raw = rx[pos:].strip()
+        if raw:
+            if response:
+                response += b"\n"
+            response += raw
+        return response
+    
+    def _read_response_blocking(
+        self,
+        ser,
+        timeout: float,
+        cancelled: threading.Event,
+        terminator: Callable[[str], bool],
+    ) -> bytearray:
+        """
+        Válasz sorok olvasása blokkoló módon (I/O szálon fut).
+        
+        A nem üres sorok nyers bájtjai egyetlen pufferbe kerülnek
+        newline-nal elválasztva (a hívó egyszer dekódol, nincs sor lista
+        és join).
+        
+        Lezáró sornál (terminator) azonnal visszatér, egyébként
+        ha már van válasz és 50 ms-ig nem jön több adat, vagy timeout-kor.
+        """
+        response = bytearray()
+        deadline = time.monotonic() + timeout
+        
+        while not cancelled.is_set():
+            try:
+                in_waiting = ser.in_waiting
+            except Exception:
+                break
             
             if in_waiting > 0:
                 try:
-
-
-                    line_bytes = await asyncio.to_thread(self._serial.readline)
-                    line = line_bytes.decode(errors='replace').strip()
-                    if line:
-                        response_lines.append(line)
-                        # Alap implementáció: nincs speciális lezáró karakter
-                        # A leszármazottak felülírják
+                    raw = ser.readline().strip()
+                    if raw:
+                        if response:
+                            response += b"\n"
+                        response += raw
+                        if terminator(raw.decode(errors='replace')):
+                            break
                 except Exception:
                     pass
             else:
                 # Ha van már válasz és nincs több adat, kész
-                if response_lines:
-                    await asyncio.sleep(0.05)
-                    in_waiting2 = await asyncio.to_thread(
-                        lambda: self._serial.in_waiting if self._serial else 0
-                    )
-                    if in_waiting2 == 0:
+                if response:
+                    time.sleep(0.05)
+                    try:
+                        if ser.in_waiting == 0:
+                            break
+                    except Exception:
                         break
-                await asyncio.sleep(0.01)
+                time.sleep(0.01)
             
             # Timeout
-            if asyncio.get_event_loop().time() - start_time > timeout:
+            if time.monotonic() > deadline:
                 break
         
-        return "\n".join(response_lines)
+        return response
+    
+    def _is_response_terminator(self, line: str) -> bool:
+        """
+        Válasz-lezáró sor-e (pl. GRBL "ok" / "error:X").
+        
+        Alap implementáció: nincs speciális lezáró sor, a válasz végét
+        az adat elmaradása jelzi. A leszármazottak felülírják.
+        """
+        return False
     
     async def _read_response(self, timeout: float = None) -> str:
         """
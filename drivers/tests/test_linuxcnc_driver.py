@@ -0,0 +1,100 @@
+"""
+Tests for LinuxCNC driver helpers (no running LinuxCNC required).
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+import linuxcnc_driver
+from base import Position
+from linuxcnc_driver import LinuxCNCDevice, _fast_parse_ini
+
+
+def test_fast_parse_ini_sections_and_values():
+    text = """
+# LinuxCNC config
+[TRAJ]
+MAX_LINEAR_VELOCITY = 25.0
+
+[AXIS_X]
+MIN_LIMIT = -1.0
+MAX_LIMIT=300.0
+; comment
+[SPINDLE_0]
+MAX_FORWARD_VELOCITY = 24000
+"""
+    config = _fast_parse_ini(text)
+    assert config["TRAJ"]["MAX_LINEAR_VELOCITY"] == "25.0"
+    assert config["AXIS_X"] == {"MIN_LIMIT": "-1.0", "MAX_LIMIT": "300.0"}
+    assert config["SPINDLE_0"]["MAX_FORWARD_VELOCITY"] == "24000"
+
+
+def test_fast_parse_ini_splits_on_first_equals_only():
+    config = _fast_parse_ini("[DISPLAY]\nOPEN_FILE = a=b.ngc\n")
+    assert config["DISPLAY"]["OPEN_FILE"] == "a=b.ngc"
+
+
+def test_fast_parse_ini_ignores_keys_before_first_section():
+    config = _fast_parse_ini("ORPHAN = 1\n[EMC]\nMACHINE = mill\n")
+    assert config == {"EMC": {"MACHINE": "mill"}}
+
+
+class _FakeLinuxcncError(Exception):
+    pass
+
+
+@pytest.fixture
+def offset_device(monkeypatch):
+    """LinuxCNCDevice futó LinuxCNC nélkül: a command/wait hívások mockolva"""
+    monkeypatch.setattr(
+        linuxcnc_driver, "linuxcnc",
+        SimpleNamespace(error=_FakeLinuxcncError, MODE_MDI=3),
+        raising=False,
+    )
+    device = LinuxCNCDevice.__new__(LinuxCNCDevice)
+    device._command = Mock()
+    device._ensure_enabled = AsyncMock(return_value=True)
+    device._ensure_mode = AsyncMock(return_value=True)
+    device._wait_complete = AsyncMock(return_value=True)
+    return device
+
+
+@pytest.mark.asyncio
+async def test_work_offsets_batch_reports_success_after_completion(offset_device):
+    results = await offset_device.set_work_offsets_batch([
+        ("G54", None),
+        ("G99", None),
+        ("g55", Position(x=1.0, y=2.0, z=3.0)),
+    ])
+
+    assert results == [True, False, True]
+    sent = [call.args[0] for call in offset_device._command.mdi.call_args_list]
+    assert sent == ["G10 L20 P1 X0 Y0 Z0", "G10 L20 P2 X1.0 Y2.0 Z3.0"]
+    offset_device._wait_complete.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_work_offsets_batch_fails_when_wait_complete_fails(offset_device):
+    offset_device._wait_complete.return_value = False
+
+    results = await offset_device.set_work_offsets_batch([("G54", None), ("G55", None)])
+
+    assert results == [False, False]
+
+
+@pytest.mark.asyncio
+async def test_work_offsets_batch_fails_on_linuxcnc_error(offset_device):
+    offset_device._command.mdi.side_effect = [None, _FakeLinuxcncError("abort")]
+
+    results = await offset_device.set_work_offsets_batch([("G54", None), ("G55", None)])
+
+    assert results == [False, False]
+
+
+@pytest.mark.asyncio
+async def test_set_work_offset_disconnected_returns_false(offset_device):
+    offset_device._command = None
+
+    assert await offset_device.set_work_offset("G54") is False
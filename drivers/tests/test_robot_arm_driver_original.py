@@ -0,0 +1,236 @@
+"""
+Robot Arm (legacy firmware) Driver Tests - hamis soros porttal
+Multi-Robot Control System
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from robot_arm_driver_original import RobotArmDevice
+
+
+class FakeFirmware:
+    """
+    Legacy firmware szimuláció (pyserial-szerű in_waiting / read / write).
+
+    A kiírt sorokra a replies szerinti választ adja: a parancs első szava
+    alapján (reply sablon, késleltetés s). Nem szereplő parancsra nincs válasz.
+    """
+
+    is_open = True
+
+    def __init__(self, replies: Dict[str, Tuple[str, float]]):
+        self.replies = replies
+        self.lines: List[str] = []
+        self._rx = bytearray()
+        self._out = bytearray()
+        self._pending: List[Tuple[float, bytes]] = []
+
+    def write(self, data: bytes) -> int:
+        self._rx += data
+        while b"\n" in self._rx:
+            raw, _, rest = bytes(self._rx).partition(b"\n")
+            self._rx = bytearray(rest)
+            line = raw.decode().strip()
+            if not line:
+                continue
+            self.lines.append(line)
+            reply = self.replies.get(line.split()[0].upper())
+            if reply is not None:
+                text, delay = reply
+                self._pending.append((time.monotonic() + delay, text.encode() + b"\r\n"))
+        return len(data)
+
+    def _collect(self) -> None:
+        """Lejárt késleltetésű válaszok átrakása az olvasható pufferbe"""
+        now = time.monotonic()
+        self._out += b"".join(data for due, data in self._pending if due <= now)
+        self._pending = [(due, data) for due, data in self._pending if due > now]
+
+    @property
+    def in_waiting(self) -> int:
+        self._collect()
+        return len(self._out)
+
+    def read(self, size: int = 1) -> bytes:
+        self._collect()
+        data = bytes(self._out[:size])
+        del self._out[:size]
+        return data
+
+
+MOVE_REPLY = ("INFO: LINEAR MOVE: X0.00 Y0.00 Z0.00", 0.0)
+
+
+def _device(replies: Dict[str, Tuple[str, float]], timeout: float = 0.3) -> RobotArmDevice:
+    device = RobotArmDevice(device_id="arm", device_name="Arm", timeout=timeout)
+    device._serial = FakeFirmware(replies)
+    device._connected = True
+    return device
+
+
+class TestTeachPlay:
+    """Tanított pozíciók lejátszása"""
+
+    @pytest.fixture
+    def settle_sleeps(self, monkeypatch):
+        """A TEACH_SETTLE_TIME várakozások számlálása (a többi sleep változatlan)"""
+        calls = []
+        real_sleep = asyncio.sleep
+
+        async def sleep(delay, *args, **kwargs):
+            if delay == RobotArmDevice.TEACH_SETTLE_TIME:
+                calls.append(delay)
+                delay = 0
+            return await real_sleep(delay, *args, **kwargs)
+
+        monkeypatch.setattr(asyncio, "sleep", sleep)
+        return calls
+
+    async def _play(self, positions: List[dict], m400: Optional[str]) -> RobotArmDevice:
+        replies = {
+            "G1": MOVE_REPLY,
+            "M3": ("INFO: GRIPPER", 0.0),
+            "M10": ("INFO: SUCKER ON", 0.0),
+            "M11": ("INFO: SUCKER OFF", 0.0),
+        }
+        if m400 is not None:
+            replies["M400"] = (m400, 0.0)
+        device = _device(replies)
+        for pos in positions:
+            device._taught_positions.append(pos)
+            device._taught_gcode.append(device._position_move_bytes(pos))
+        assert await device.teach_play(speed=50)
+        return device
+
+    @pytest.mark.asyncio
+    async def test_m400_skips_settle_for_pure_moves(self, settle_sleeps):
+        pos = {"x": 1.0, "y": 2.0, "z": 3.0, "gripper": "unknown", "sucker": None}
+        device = await self._play([pos, dict(pos, x=4.0)], m400="INFO: MOVES DONE")
+
+        assert settle_sleeps == []
+        assert device._serial.lines.count("M400") == 2
+
+    @pytest.mark.asyncio
+    async def test_m400_keeps_settle_after_end_effector_change(self, settle_sleeps):
+        pos = {"x": 1.0, "y": 2.0, "z": 3.0, "gripper": "unknown", "sucker": None}
+        await self._play(
+            [pos, dict(pos, gripper="closed"), dict(pos, gripper="closed", sucker=True)],
+            m400="INFO: MOVES DONE",
+        )
+
+        # Csak a két váltás után (megfogó zár, szívó be) várunk
+        assert len(settle_sleeps) == 2
+
+    @pytest.mark.asyncio
+    async def test_without_m400_settles_after_every_position(self, settle_sleeps):
+        pos = {"x": 1.0, "y": 2.0, "z": 3.0, "gripper": "unknown", "sucker": None}
+        await self._play([pos, dict(pos, x=4.0)], m400="ERROR: COMMAND NOT RECOGNIZED")
+
+        assert len(settle_sleeps) == 2
+
+
+class TestClampProgram:
+    """Program betöltéskori szoftveres limit clamp"""
+
+    @pytest.fixture
+    def device(self):
+        return RobotArmDevice(
+            device_id="arm", device_name="Arm",
+            axis_limits={"X": [-10, 10], "Y": [-5, 5]},
+        )
+
+    def test_clamps_modal_compact_and_numbered_moves(self, device):
+        lines = [
+            "G90",
+            "G1 X50 Y2 F30",
+            "X20 Y-9",
+            "G1X11",
+            "N10 G1 X.5 Y-7.5",
+            "n20 g0 x-30",
+        ]
+
+        assert device._clamp_program(lines) == 5
+        assert lines == [
+            "G90",
+            "G1 X10.00 Y2 F30",
+            "X10.00 Y-5.00",
+            "G1X10.00",
+            "N10 G1 X.5 Y-5.00",
+            "n20 g0 x-10.00",
+        ]
+
+    def test_skips_relative_and_non_motion_lines(self, device):
+        lines = ["G91", "G1 X50", "G90 X40", "G92 X100", "G4 P1", "M3 S90"]
+
+        assert device._clamp_program(lines) == 1
+        assert lines == ["G91", "G1 X50", "G90 X10.00", "G92 X100", "G4 P1", "M3 S90"]
+
+    def test_rejects_unparseable_line(self, device):
+        with pytest.raises(ValueError, match="sor \\(2\\)"):
+            device._clamp_program(["G1 X1", "G1 X#1"])
+
+    @pytest.mark.asyncio
+    async def test_load_file_rejects_unparseable_program(self, device, tmp_path):
+        program = tmp_path / "bad.gcode"
+        program.write_text("G90\nG1 X1 Y1\nG1 X[1+2]\n")
+
+        assert not await device.load_file(str(program))
+        assert "Nem értelmezhető" in device._status.error_message
+
+
+class TestRunProgram:
+    """Program streaming nyugtázással - lassú és hiányzó válaszok"""
+
+    async def _run(self, device: RobotArmDevice, lines: List[str]) -> RobotArmDevice:
+        device._gcode_lines = lines
+        device._current_line_index = 0
+        device._running = True
+        await device._run_program()
+        return device
+
+    @pytest.mark.asyncio
+    async def test_slow_move_ack_does_not_abort(self):
+        device = _device({"G1": (MOVE_REPLY[0], 0.3)}, timeout=0.1)
+        await self._run(device, ["G90", "G1 X1 Y1 Z1", "G1 X2 Y2 Z2"])
+
+        assert device._status.error_message is None
+        assert device._current_line_index == 3
+
+    @pytest.mark.asyncio
+    async def test_missing_move_ack_stops_program(self, monkeypatch):
+        monkeypatch.setattr(RobotArmDevice, "PROGRAM_ACK_TIMEOUT", 0.1)
+        device = _device({}, timeout=0.1)
+        await self._run(device, ["G1 X1 Y1 Z1", "G1 X2 Y2 Z2"])
+
+        assert "nincs nyugta" in device._status.error_message
+        assert device._current_line_index == 0
+
+    @pytest.mark.asyncio
+    async def test_lines_without_reply_continue(self):
+        device = _device({"G1": MOVE_REPLY, "M10": ("INFO: SUCKER ON", 0.0)}, timeout=0.1)
+        await self._run(
+            device,
+            ["G92 X0 Y0 Z0", "M17", "G1 X1 Y1 Z1", "M10", "M17", "G1 X2 Y2 Z2", "M10"],
+        )
+
+        assert device._status.error_message is None
+        assert device._current_line_index == 7
+        assert device._silent_learned == {b"M17": True, b"M10": False}
+        assert device._serial.lines == [
+            "G92 X0 Y0 Z0", "M17", "G1 X1 Y1 Z1", "M10", "M17", "G1 X2 Y2 Z2", "M10",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_unrecognized_command_is_skipped(self):
+        device = _device(
+            {"G1": MOVE_REPLY, "M5": ("ERROR: COMMAND NOT RECOGNIZED", 0.0)}, timeout=0.1
+        )
+        await self._run(device, ["G1 X1 Y1 Z1", "M5", "G1 X2 Y2 Z2"])
+
+        assert device._status.error_message is None
+        assert device._current_line_index == 3
+        assert device._silent_learned == {b"M5": False}
@@ -0,0 +1,141 @@
+"""
+Robot Arm Kinematics Tests - IK ág választás és elérhetőségi előszűrés
+Multi-Robot Control System
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+try:
+    from kinematics import (
+        RobotConfig,
+        JointAngles,
+        forward_kinematics,
+        inverse_kinematics_branches,
+        select_ik_solution,
+    )
+    from robot_arm_driver import RobotArmDevice, KINEMATICS_AVAILABLE
+except ImportError:
+    KINEMATICS_AVAILABLE = False
+    RobotArmDevice = None
+
+
+pytestmark = pytest.mark.skipif(
+    not KINEMATICS_AVAILABLE,
+    reason="kinematics modul nem elérhető",
+)
+
+# Könyök-lefelé ágon álló kar, J3 közel a felső végálláshoz (40°)
+ELBOW_DOWN_SEED = (0.0, 30.0, 38.0)
+
+
+@pytest.fixture
+def config():
+    return RobotConfig()
+
+
+@pytest.fixture
+def device():
+    device = RobotArmDevice(device_id="arm", device_name="Arm", port="/dev/null")
+    device.move_to_joints = AsyncMock(return_value=True)
+    return device
+
+
+def _set_joint_pose(device, j1: float, j2: float, j3: float) -> None:
+    device._joint_position = JointAngles(j1=j1, j2=j2, j3=j3)
+
+
+class TestSelectIkSolution:
+    """Könyök ág választás a seed alapján"""
+
+    def test_no_seed_returns_elbow_up(self, config):
+        up = JointAngles(0, 50, -30)
+        down = JointAngles(0, 17, 30)
+        assert select_ik_solution((up, down), None, config) is up
+
+    def test_keeps_seed_branch(self, config):
+        up = JointAngles(0, 50, -30)
+        down = JointAngles(0, 17, 30)
+        assert select_ik_solution((up, down), JointAngles(0, 18, 29), config) is down
+        assert select_ik_solution((up, down), JointAngles(0, 49, -29), config) is up
+
+    def test_invalid_seed_branch_is_not_flipped(self, config):
+        up = JointAngles(0, 74, -41.5)
+        down = JointAngles(0, 29, 41.5, False, "J3 végállás")
+        result = select_ik_solution((up, down), JointAngles(*ELBOW_DOWN_SEED), config)
+        assert result is down
+        assert not result.valid
+
+    def test_switches_branch_near_straight_arm(self, config):
+        up = JointAngles(0, 40, -1, False, "J2 végállás")
+        down = JointAngles(0, 40.5, 1)
+        assert select_ik_solution((up, down), JointAngles(0, 40, -0.5), config) is down
+
+    def test_branches_round_trip(self, config):
+        pos = forward_kinematics(*ELBOW_DOWN_SEED, config)
+        up, down = inverse_kinematics_branches(pos.x, pos.y, pos.z, config)
+        assert up.j3 < 0 < down.j3
+        assert down.j2 == pytest.approx(ELBOW_DOWN_SEED[1])
+        assert down.j3 == pytest.approx(ELBOW_DOWN_SEED[2])
+
+
+class TestMoveToXyz:
+    """Cartesian mozgás IK ág választással és elérhetőségi előszűréssel"""
+
+    @pytest.mark.asyncio
+    async def test_small_step_stays_on_seed_branch(self, device, config):
+        _set_joint_pose(device, *ELBOW_DOWN_SEED)
+        pos = forward_kinematics(0.0, 31.0, 36.0, config)
+
+        assert await device.move_to_xyz(pos.x, pos.y, pos.z)
+
+        j1, j2, j3 = device.move_to_joints.await_args.args[:3]
+        assert j2 == pytest.approx(31.0, abs=0.1)
+        assert j3 == pytest.approx(36.0, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_seed_follows_commanded_joints_over_status(self, device, config):
+        _set_joint_pose(device, *ELBOW_DOWN_SEED)
+        # Elavult status poll: még a könyök-felfelé ágat mutatja
+        device._status.position.x = 0.0
+        device._status.position.y = 50.0
+        device._status.position.z = -30.0
+        pos = forward_kinematics(0.0, 31.0, 36.0, config)
+
+        assert await device.move_to_xyz(pos.x, pos.y, pos.z)
+
+        assert device.move_to_joints.await_args.args[2] > 0
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_status_without_joint_position(self, device, config):
+        device._joint_position = None
+        device._status.position.x, device._status.position.y, device._status.position.z = ELBOW_DOWN_SEED
+        pos = forward_kinematics(0.0, 31.0, 36.0, config)
+
+        assert await device.move_to_xyz(pos.x, pos.y, pos.z)
+
+        assert device.move_to_joints.await_args.args[2] > 0
+
+    @pytest.mark.asyncio
+    async def test_step_past_limit_is_rejected_instead_of_flipping(self, device, config):
+        _set_joint_pose(device, *ELBOW_DOWN_SEED)
+        pos = forward_kinematics(*ELBOW_DOWN_SEED, config)
+
+        assert not await device.move_to_xyz(pos.x - 5.0, pos.y, pos.z)
+        device.move_to_joints.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_unreachable_target_rejected_before_ik(self, device, config):
+        device._ik_cached = lambda *args: pytest.fail("IK nem futhat elérhetetlen célra")
+        reach = config.L2 + config.L3
+
+        assert not await device.move_to_xyz(reach + 10.0, 0.0, config.L1)
+        assert not await device.move_to_xyz(0.0, 0.0, config.L1)
+        device.move_to_joints.assert_not_awaited()
+
+    def test_reach_shell_bounds(self, device, config):
+        reach = config.L2 + config.L3
+        assert device._is_reachable(reach, 0.0, config.L1)
+        assert not device._is_reachable(reach + 1.0, 0.0, config.L1)
+        assert device._is_reachable(0.0, 0.0, config.L1 + abs(config.L2 - config.L3))
@@ -0,0 +1,82 @@
+"""
+Serial Device Base Tests - válasz olvasás pseudo-terminálon
+Multi-Robot Control System
+"""
+
+import asyncio
+import os
+
+import pytest
+
+try:
+    from grbl_driver import GrblDevice
+    from serial_base import SERIAL_AVAILABLE
+except ImportError:
+    SERIAL_AVAILABLE = False
+    GrblDevice = None
+
+
+pytestmark = pytest.mark.skipif(
+    not SERIAL_AVAILABLE or not hasattr(os, "openpty"),
+    reason="pyserial vagy pty nem elérhető",
+)
+
+
+@pytest.fixture
+async def pty_device():
+    """GrblDevice egy pty slave végén; a master végen 'a firmware' válaszol"""
+    master, slave = os.openpty()
+    device = GrblDevice(device_id="pty", device_name="PTY", port=os.ttyname(slave))
+    assert await device._open_serial()
+    try:
+        yield device, master
+    finally:
+        await device._close_serial()
+        os.close(master)
+        os.close(slave)
+
+
+def _reply_after_command(master: int, reply: bytes) -> asyncio.Future:
+    """Megvárja a kiküldött parancsot a master végen, majd válaszol"""
+    def respond() -> bytes:
+        command = os.read(master, 256)
+        os.write(master, reply)
+        return command
+    return asyncio.get_running_loop().run_in_executor(None, respond)
+
+
+class TestEventedResponseRead:
+    """add_reader alapú válasz olvasás"""
+
+    @pytest.mark.asyncio
+    async def test_returns_on_terminator_line(self, pty_device):
+        device, master = pty_device
+        sent = _reply_after_command(master, b"[MSG:Caution]\r\nok\r\n")
+
+        response = await device._send_command("G90", timeout=1.0)
+
+        assert await sent == b"G90\r\n"
+        assert response == "[MSG:Caution]\nok"
+
+    @pytest.mark.asyncio
+    async def test_unterminated_response_ends_after_quiet_time(self, pty_device):
+        device, master = pty_device
+        sent = _reply_after_command(master, b"Grbl 1.1h\r\npartial")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        response = await device._send_command("$I", timeout=2.0)
+
+        await sent
+        assert response == "Grbl 1.1h\npartial"
+        assert loop.time() - started < 1.0
+
+    @pytest.mark.asyncio
+    async def test_no_response_times_out_empty(self, pty_device):
+        device, master = pty_device
+        sent = _reply_after_command(master, b"")
+
+        response = await device._send_command("G4 P0", timeout=0.2)
+
+        await sent
+        assert response == ""